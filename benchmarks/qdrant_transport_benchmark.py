@@ -0,0 +1,119 @@
+"""
+Compare Qdrant REST and gRPC transports for the hybrid search and the upload paths.
+
+Uses random vectors with the shapes of the production collection (384-d dense, ColBERT 128-d multivectors,
+BM25 sparse) so the measurement isolates transport and serialization from model inference.
+
+Usage:
+    python -m benchmarks.qdrant_transport_benchmark --url http://localhost:6333 --grpc-port 6334
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+DENSE_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+LATE_NAME = "colbert-ir/colbertv2.0"
+SPARSE_NAME = "Qdrant/bm25"
+DENSE_DIM = 384
+LATE_DIM = 128
+
+
+def create_collection(client: QdrantClient, collection_name: str) -> None:
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config={
+            DENSE_NAME: models.VectorParams(size=DENSE_DIM, distance=models.Distance.COSINE),
+            LATE_NAME: models.VectorParams(
+                size=LATE_DIM,
+                distance=models.Distance.COSINE,
+                multivector_config=models.MultiVectorConfig(comparator=models.MultiVectorComparator.MAX_SIM),
+            ),
+        },
+        sparse_vectors_config={SPARSE_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)},
+    )
+
+
+def random_sparse(rng: np.random.Generator, nnz: int = 30) -> models.SparseVector:
+    indices = rng.choice(100000, size=nnz, replace=False)
+    return models.SparseVector(indices=indices.tolist(), values=rng.random(nnz).tolist())
+
+
+def random_points(rng: np.random.Generator, count: int, tokens: int):
+    return [
+        models.PointStruct(
+            id=str(uuid.uuid4()),
+            vector={
+                DENSE_NAME: rng.random(DENSE_DIM).tolist(),
+                LATE_NAME: rng.random((tokens, LATE_DIM)).tolist(),
+                SPARSE_NAME: random_sparse(rng),
+            },
+            payload={"page_content": "x" * 300, "metadata": {"index": i}},
+        )
+        for i in range(count)
+    ]
+
+
+def bench_upload(client: QdrantClient, collection_name: str, rng: np.random.Generator,
+                 points: int, batch_size: int, tokens: int) -> float:
+    batches = [random_points(rng, batch_size, tokens) for _ in range(points // batch_size)]
+    start = time.perf_counter()
+    for batch in batches:
+        client.upsert(collection_name, points=batch, wait=True)
+    return time.perf_counter() - start
+
+
+def bench_search(client: QdrantClient, collection_name: str, rng: np.random.Generator,
+                 queries: int, query_tokens: int) -> list:
+    latencies = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        client.query_points(
+            collection_name,
+            prefetch=[
+                models.Prefetch(query=rng.random(DENSE_DIM).tolist(), using=DENSE_NAME, limit=40),
+                models.Prefetch(query=random_sparse(rng, 8), using=SPARSE_NAME, limit=40),
+            ],
+            query=rng.random((query_tokens, LATE_DIM)).tolist(),
+            using=LATE_NAME,
+            with_payload=True,
+            limit=20,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--grpc-port", type=int, default=6334)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--tokens", type=int, default=80, help="ColBERT vectors per uploaded chunk")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-tokens", type=int, default=32, help="ColBERT vectors per query")
+    args = parser.parse_args()
+
+    print(f"{'transport':<10}{'upload s':>10}{'search p50 ms':>16}{'search p95 ms':>16}")
+    for transport, prefer_grpc in (("rest", False), ("grpc", True)):
+        client = QdrantClient(url=args.url, grpc_port=args.grpc_port, prefer_grpc=prefer_grpc, timeout=600)
+        collection_name = f"transport_benchmark_{transport}_{uuid.uuid4().hex[:8]}"
+        rng = np.random.default_rng(0)
+        create_collection(client, collection_name)
+        try:
+            upload_seconds = bench_upload(client, collection_name, rng, args.points, args.batch_size, args.tokens)
+            # Warm up connections and caches before timing the searches
+            bench_search(client, collection_name, rng, 10, args.query_tokens)
+            latencies = bench_search(client, collection_name, rng, args.queries, args.query_tokens)
+            p95 = statistics.quantiles(latencies, n=20)[18]
+            print(f"{transport:<10}{upload_seconds:>10.2f}{statistics.median(latencies):>16.2f}{p95:>16.2f}")
+        finally:
+            client.delete_collection(collection_name)
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
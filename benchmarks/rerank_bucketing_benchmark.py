@@ -0,0 +1,98 @@
+"""
+Measure cross-encoder throughput with and without length bucketing.
+
+The workload mixes short titles with long, section-expanded chunks, as the reranker sees them after hybrid search.
+"before" sends every request batch to compute_score as is (padded to its longest pair), "after" goes through
+score_pairs_bucketed. Both paths must return the same scores.
+
+Usage:
+    python -m benchmarks.rerank_bucketing_benchmark --model-key BAAI_COLLECTION_RERANK --requests 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.config import settings
+from src.helpers.model_loader_helper import ModelLoader
+from src.helpers.inference_tasks_helper import score_pairs_bucketed
+
+TITLES = [
+    "Password reset",
+    "Refund policy",
+    "Network ports",
+    "Document chunking",
+    "Search filters",
+]
+
+CHUNK = ("Documents are partitioned by their markdown headers and each section is split into overlapping chunks "
+         "before embedding. When a chunk ranks high, the neighbouring chunks of its section are merged back so "
+         "the answer is generated from the full context of the section. ")
+
+
+def build_requests(rng: np.random.Generator, requests: int, candidates: int, long_ratio: float) -> list:
+    batches = []
+    for request in range(requests):
+        query = f"How are uploaded documents split into chunks? ({request})"
+        pairs = []
+        for _ in range(candidates):
+            if rng.random() < long_ratio:
+                passage = CHUNK * int(rng.integers(1, 6))
+            else:
+                passage = TITLES[int(rng.integers(len(TITLES)))]
+            pairs.append([query, passage])
+        batches.append(pairs)
+    return batches
+
+
+def run_plain(reranker, batches: list, max_length: int) -> tuple:
+    scores = []
+    start = time.perf_counter()
+    for pairs in batches:
+        scores.append(np.atleast_1d(np.asarray(
+            reranker.compute_score(pairs, batch_size=len(pairs), max_length=max_length, normalize=True), dtype=float)))
+    return time.perf_counter() - start, np.concatenate(scores)
+
+
+def run_bucketed(reranker, batches: list, max_length: int, max_size: int, max_tokens: int) -> tuple:
+    scores = []
+    start = time.perf_counter()
+    for pairs in batches:
+        scores.append(score_pairs_bucketed(reranker, pairs, max_length=max_length, max_size=max_size,
+                                           max_tokens=max_tokens))
+    return time.perf_counter() - start, np.concatenate(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-key", default="BAAI_COLLECTION_RERANK")
+    parser.add_argument("--backend", default=None, help="torch, onnx or onnx-int8, defaults to model_config.yaml")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=64, help="Pairs per batch, as merged by the scheduler")
+    parser.add_argument("--long-ratio", type=float, default=0.3, help="Share of long section chunks")
+    parser.add_argument("--max-length", type=int, default=settings.RERANK_MAX_LENGTH)
+    parser.add_argument("--bucket-size", type=int, default=settings.RERANK_BUCKET_MAX_SIZE)
+    parser.add_argument("--bucket-tokens", type=int, default=settings.RERANK_BUCKET_MAX_TOKENS)
+    args = parser.parse_args()
+
+    reranker = ModelLoader.get_flag_reranker(args.model_key, args.backend)
+    batches = build_requests(np.random.default_rng(0), args.requests, args.candidates, args.long_ratio)
+    total_pairs = args.requests * args.candidates
+
+    # Warm up both paths before timing
+    run_plain(reranker, batches[:1], args.max_length)
+    run_bucketed(reranker, batches[:1], args.max_length, args.bucket_size, args.bucket_tokens)
+
+    plain_seconds, plain_scores = run_plain(reranker, batches, args.max_length)
+    bucketed_seconds, bucketed_scores = run_bucketed(reranker, batches, args.max_length, args.bucket_size,
+                                                     args.bucket_tokens)
+
+    print(f"{'path':<10}{'seconds':>10}{'pairs/s':>12}")
+    print(f"{'before':<10}{plain_seconds:>10.2f}{total_pairs / plain_seconds:>12.1f}")
+    print(f"{'after':<10}{bucketed_seconds:>10.2f}{total_pairs / bucketed_seconds:>12.1f}")
+    print(f"speedup {plain_seconds / bucketed_seconds:.2f}x, "
+          f"max |score diff| {float(np.max(np.abs(plain_scores - bucketed_scores))):.5f}")
+
+
+if __name__ == "__main__":
+    main()
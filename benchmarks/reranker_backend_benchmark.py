@@ -0,0 +1,124 @@
+"""
+Compare the ONNX Runtime reranker backends with the PyTorch (FlagReranker) path.
+
+For every backend the script checks score parity against PyTorch (max absolute difference of the normalised
+scores and top-k agreement per query) and measures scoring latency. It exits with status 1 when a backend
+drifts further than --tolerance from the PyTorch scores.
+
+Usage:
+    python -m benchmarks.reranker_backend_benchmark --model-key BAAI_COLLECTION_RERANK --backends onnx onnx-int8
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from src.helpers.model_loader_helper import ModelLoader
+
+QUERIES = [
+    "How do I reset my password?",
+    "What is the refund policy for annual subscriptions?",
+    "Which ports does the vector database listen on?",
+    "How are uploaded documents split into chunks?",
+    "Can I restrict a search to PDF files only?",
+    "What happens when the inference pool is saturated?",
+    "How long are chat sessions kept?",
+    "Which embedding models are used for hybrid search?",
+]
+
+PASSAGES = [
+    "To reset your password open the account settings page and choose 'Forgot password'. "
+    "A reset link valid for 30 minutes is sent to the registered e-mail address.",
+    "Annual subscriptions can be refunded in full within 14 days of purchase. After that period "
+    "the remaining months are credited to the account instead of being refunded.",
+    "Qdrant serves its REST API on port 6333 and its gRPC API on port 6334.",
+    "Documents are partitioned by their markdown headers and each section is split into overlapping "
+    "chunks of roughly 500 characters before embedding.",
+    "Searches accept document id, file name and extension filters which are applied inside the vector "
+    "database before ranking.",
+    "When more calls are pending than the configured limit, new callers wait for a slot and receive a 503 "
+    "once the queue timeout has passed.",
+    "Chat history is stored in PostgreSQL and sessions are kept until the user deletes them.",
+    "Hybrid search combines MiniLM dense vectors, BM25 sparse vectors and ColBERT late interaction rescoring.",
+    "The office is closed on public holidays.",
+    "Invoices are issued on the first business day of each month.",
+]
+
+
+def build_pairs(passages_per_query: int, length_multiplier: int) -> list:
+    rng = np.random.default_rng(0)
+    pairs = []
+    for query in QUERIES:
+        for index in rng.choice(len(PASSAGES), size=passages_per_query, replace=True):
+            pairs.append([query, " ".join([PASSAGES[index]] * length_multiplier)])
+    return pairs
+
+
+def score(reranker, pairs: list, batch_size: int) -> np.ndarray:
+    return np.atleast_1d(np.asarray(reranker.compute_score(pairs, batch_size=batch_size, normalize=True),
+                                    dtype=float))
+
+
+def time_scoring(reranker, pairs: list, batch_size: int, request_size: int, repeats: int) -> list:
+    latencies = []
+    for _ in range(repeats):
+        for start in range(0, len(pairs), request_size):
+            begin = time.perf_counter()
+            score(reranker, pairs[start:start + request_size], batch_size)
+            latencies.append((time.perf_counter() - begin) * 1000)
+    return latencies
+
+
+def top_k_agreement(reference: np.ndarray, candidate: np.ndarray, group_size: int, k: int) -> float:
+    overlaps = []
+    for start in range(0, len(reference), group_size):
+        reference_top = set(np.argsort(-reference[start:start + group_size])[:k])
+        candidate_top = set(np.argsort(-candidate[start:start + group_size])[:k])
+        overlaps.append(len(reference_top & candidate_top) / k)
+    return float(np.mean(overlaps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-key", default="BAAI_COLLECTION_RERANK")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"])
+    parser.add_argument("--passages-per-query", type=int, default=20, help="Candidates per query, one request")
+    parser.add_argument("--length-multiplier", type=int, default=2, help="Repeat passages to lengthen them")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Max absolute difference of normalised scores allowed against PyTorch")
+    args = parser.parse_args()
+
+    pairs = build_pairs(args.passages_per_query, args.length_multiplier)
+    top_k = min(args.top_k, args.passages_per_query)
+
+    print(f"{'backend':<12}{'p50 ms':>10}{'p95 ms':>10}{'max |diff|':>12}{f'top-{top_k} agree':>14}")
+    reference = None
+    failed = []
+    for backend in ["torch", *[backend for backend in args.backends if backend != "torch"]]:
+        reranker = ModelLoader.get_flag_reranker(args.model_key, backend)
+        scores = score(reranker, pairs, args.batch_size)
+        # Warm up before timing
+        time_scoring(reranker, pairs, args.batch_size, args.passages_per_query, 1)
+        latencies = time_scoring(reranker, pairs, args.batch_size, args.passages_per_query, args.repeats)
+        p95 = statistics.quantiles(latencies, n=20)[18]
+
+        if reference is None:
+            reference = scores
+        max_diff = float(np.max(np.abs(scores - reference)))
+        agreement = top_k_agreement(reference, scores, args.passages_per_query, top_k)
+        if max_diff > args.tolerance:
+            failed.append(backend)
+        print(f"{backend:<12}{statistics.median(latencies):>10.2f}{p95:>10.2f}{max_diff:>12.4f}{agreement:>14.2f}")
+
+    if failed:
+        print(f"Score parity check failed for: {', '.join(failed)} (tolerance {args.tolerance})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
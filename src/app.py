@@ -12,7 +12,7 @@ class IncludeAPIRouter(object):
         from src.routers.documents import router as router_document_management
         from src.routers.retriever import router as router_retriever
         from src.routers.rerank import router as router_rerank
-        from src.routers.llm_chat import router as router_chatllm
+        from src.routers.llm_chat import router as router_chatllm, ws_router as router_chatllm_ws
         
         router = APIRouter(prefix='/api/v1')
         router.include_router(router_health_check, tags=['Health Check'])
@@ -22,6 +22,7 @@ class IncludeAPIRouter(object):
         router.include_router(router_retriever, tags=['Retriever'])
         router.include_router(router_rerank, tags=['Reranking'])
         router.include_router(router_chatllm, tags=['Chat with LLM'])
+        router.include_router(router_chatllm_ws, tags=['Chat with LLM'])
         
         return router
 
@@ -52,6 +52,20 @@ class Authentication:
             raise credentials_exception
         return user
 
+    @staticmethod
+    def get_user_from_token(token: str) -> Optional[User]:
+        """
+        User of a bearer token, None when the token is invalid. Used where the OAuth2 dependency is not available (WebSocket).
+        """
+        try:
+            payload = jwt.decode(token, auth_config.get("SECRET_KEY"), algorithms=[auth_config.get("ALGORITHM")])
+        except JWTError:
+            return None
+        username = payload.get("sub")
+        if username is None:
+            return None
+        return Authentication.get_user(user_repo.get_all(), username=username)
+
     @staticmethod
     async def get_current_active_user(current_user: Annotated[User, Depends(get_current_user)]) -> User:
         user = await current_user
@@ -7,6 +7,7 @@ from fastapi import UploadFile
 
 from src.utils.config import settings
 from src.helpers.qdrant_connection_helper import QdrantConnection
+from src.helpers.collection_registry_helper import collection_registry
 from src.database.data_layer_access.file_management_dal import FileManagementDAL
 
 from src.handlers.file_partition_handler import DocumentExtraction
@@ -68,6 +69,14 @@ class DataIngestion(LoggerMixin):
                documents=resp.data, 
                collection_name=collection_name
             )
+
+            # Store the parent section records so retrieval can resolve a hit with one lookup
+            await self.qdrant_client.add_section_documents(
+               documents=self.data_extraction.build_section_documents(resp.data),
+               collection_name=collection_name
+            )
+            # Point counts changed, drop the cached collection facts
+            collection_registry.invalidate(collection_name)
             
             print(f"\nChunking Results:")
             print(f"  - Total chunks: {len(resp.data)}")
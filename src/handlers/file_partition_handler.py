@@ -1,4 +1,6 @@
+import os
 import uuid
+from typing import List
 from fastapi import UploadFile
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.text_splitter import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
@@ -44,6 +46,7 @@ class DocumentExtraction(LoggerMixin):
                     document_id: uuid):
         
         valid= self.validate_file_extension(file)
+        extension = os.path.splitext(file.filename)[1][1:].lower()
         
         if valid == "pdf" and backend == "pymupdf":
             markdown_text= await self.pymupdf_extract(temp_file_path)
@@ -56,7 +59,8 @@ class DocumentExtraction(LoggerMixin):
                 'document_name': file.filename,
                 'index': 1,
                 'headers': file.filename,
-                'document_id': document_id
+                'document_id': document_id,
+                'extension': extension
             }
             documents = [doc]
         else:
@@ -89,7 +93,8 @@ class DocumentExtraction(LoggerMixin):
                         'document_name': file.filename,
                         'index': idx,
                         'headers': headers_string,
-                        'document_id': document_id
+                        'document_id': document_id,
+                        'extension': extension
                     }
             
         if len(documents) > 0:
@@ -102,6 +107,21 @@ class DocumentExtraction(LoggerMixin):
                                     data=None)
         return response
     
+    @staticmethod
+    def build_section_documents(documents: List[Document]) -> List[Document]:
+        # One parent document per (document, headers) section, chunks joined in index order
+        sections = {}
+        for document in sorted(documents, key=lambda doc: doc.metadata['index']):
+            key = (document.metadata['document_id'], document.metadata['headers'])
+            if key not in sections:
+                sections[key] = Document(page_content='', metadata={
+                    'document_name': document.metadata['document_name'],
+                    'headers': document.metadata['headers'],
+                    'document_id': document.metadata['document_id'],
+                })
+            sections[key].page_content += document.page_content
+        return list(sections.values())
+
     async def pymupdf_extract(self, temp_file_path: str):
         doc = pymupdf.open(temp_file_path)
         header_identifier = pymupdf4llm.IdentifyHeaders(doc, body_limit=6)
@@ -1,5 +1,5 @@
 from src.utils.logger.custom_logging import LoggerMixin
-from src.handlers.retrieval_handler import SearchRetrieval
+from src.handlers.retrieval_handler import default_search_retrieval
 from src.helpers.llm_helper import LLMGenerator
 from src.helpers.prompt_template_helper import ContextualizeQuestionHistoryTemplate, QuestionAnswerTemplate
 from src.schemas.response import BasicResponse
@@ -12,7 +12,7 @@ from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, System
 
 import datetime 
 import time
-from typing import List, Tuple
+from typing import Any, AsyncIterator, Dict, List, Tuple
 
 # Initialize the chat service
 chat_service = ChatService()
@@ -20,7 +20,8 @@ chat_service = ChatService()
 class ChatHandler(LoggerMixin):
     def __init__(self) -> None:
         super().__init__()
-        self.search_retrieval = SearchRetrieval()
+        # Shared per process, it holds no per-request state
+        self.search_retrieval = default_search_retrieval
         self.llm_generator = LLMGenerator()
     
     def create_session_id(self, user_id: str) -> BasicResponse:
@@ -50,16 +51,15 @@ class ChatHandler(LoggerMixin):
                 data=None
             )
 
-    async def _get_chat_flow(self, model_name: str, collection_name: str) -> Tuple[Runnable, Runnable]:
+    async def _get_chains(self, model_name: str) -> Tuple[Runnable, Runnable]:
         """
-        Create the chat flow for retrieving context and generating responses
+        Create the LLM chains shared by the blocking and the streaming chat flows
         
         Args:
             model_name: The name of the LLM model to use
-            collection_name: The name of the vector collection to query
             
         Returns:
-            Tuple[Runnable, Runnable]: The conversation chain and rewrite chain
+            Tuple[Runnable, Runnable]: The answer chain (input, context -> answer) and rewrite chain
         """
         # Get the language model
         llm = await self.llm_generator.get_llm(model=model_name)
@@ -68,26 +68,71 @@ class ChatHandler(LoggerMixin):
         rewrite_prompt = ContextualizeQuestionHistoryTemplate
         rewrite_chain = (rewrite_prompt | llm | StrOutputParser()).with_config(run_name='rewrite_chain')
 
+        # Chain generating the response from the question and the retrieved context
+        answer_chain = QuestionAnswerTemplate | llm | StrOutputParser()
+
+        return answer_chain, rewrite_chain
+
+    async def _retrieve(self, query: str, collection_name: str) -> List:
+        return await self.search_retrieval.qdrant_retrieval(query=query, collection_name=collection_name) or []
+
+    @staticmethod
+    def _format_docs(docs) -> str:
+        return "\n\n".join(doc.page_content for doc in docs)
+
+    async def _get_chat_flow(self, model_name: str, collection_name: str) -> Tuple[Runnable, Runnable]:
+        """
+        Create the chat flow for retrieving context and generating responses
+        
+        Args:
+            model_name: The name of the LLM model to use
+            collection_name: The name of the vector collection to query
+            
+        Returns:
+            Tuple[Runnable, Runnable]: The conversation chain and rewrite chain
+        """
+        answer_chain, rewrite_chain = await self._get_chains(model_name)
+
         # Define the retrieval function
         async def retriever_function(query):
-            return await self.search_retrieval.qdrant_retrieval(query=query, collection_name=collection_name)
-        
-        # Format documents function
-        def format_docs(docs):
-            return "\n\n".join(doc.page_content for doc in docs)
+            return await self._retrieve(query, collection_name)
 
         # Main conversation chain that combines the rewritten query, context, and generates a response
         chain = (
             {
-                "context": itemgetter("rewrite_input") | RunnableLambda(retriever_function).with_config(run_name='stage_retrieval') | format_docs,
+                "context": itemgetter("rewrite_input") | RunnableLambda(retriever_function).with_config(run_name='stage_retrieval') | self._format_docs,
                 "input": itemgetter("input")
             }
-            | QuestionAnswerTemplate
-            | llm
-            | StrOutputParser()
+            | answer_chain
         ).with_config(run_name='conversational_rag')
 
         return chain, rewrite_chain
+
+    @staticmethod
+    def _start_turn(session_id: str, question_input: str) -> str:
+        """
+        Save the user's question and a placeholder for the assistant's response
+        
+        Args:
+            session_id: The chat session ID
+            question_input: The user's question
+            
+        Returns:
+            str: ID of the placeholder message, completed with `chat_service.update_assistant_response`
+        """
+        question_id = chat_service.save_user_question(
+            session_id=session_id,
+            created_at=datetime.datetime.now(),
+            created_by="user",
+            content=question_input
+        )
+        return chat_service.save_assistant_response(
+            session_id=session_id,
+            created_at=datetime.datetime.now(),
+            question_id=question_id,
+            content="",
+            response_time=0.0001
+        )
     
     async def handle_request_chat(
         self,
@@ -115,22 +160,8 @@ class ChatHandler(LoggerMixin):
                 collection_name=collection_name
             )
 
-            # Save the user's question to the database
-            question_id = chat_service.save_user_question(
-                session_id=session_id,
-                created_at=datetime.datetime.now(),
-                created_by="user",
-                content=question_input
-            )
-            
-            # Create a placeholder for the assistant's response
-            message_id = chat_service.save_assistant_response(
-                session_id=session_id,
-                created_at=datetime.datetime.now(),
-                question_id=question_id,
-                content="",
-                response_time=0.0001
-            )
+            # Save the user's question and a placeholder for the assistant's response
+            message_id = self._start_turn(session_id, question_input)
 
             # Start timing the response
             start_time = time.time()
@@ -174,6 +205,87 @@ class ChatHandler(LoggerMixin):
                 data=None
             )
 
+    async def stream_request_chat(
+        self,
+        session_id: str,
+        question_input: str,
+        model_name: str,
+        collection_name: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Handle a chat request like `handle_request_chat`, but yield the answer token by token as the LLM generates it
+        
+        Events, in order:
+            {'event': 'sources', 'data': [metadata of each retrieved document]}
+            {'event': 'token', 'data': text chunk}, repeated
+            {'event': 'done', 'data': {'message_id', 'response_time', 'time_to_first_token'}}
+        or {'event': 'error', 'data': {'message'}} when the request fails.
+        
+        Args:
+            session_id: The chat session ID
+            question_input: The user's question
+            model_name: The LLM model to use
+            collection_name: The vector collection to query
+            
+        Returns:
+            AsyncIterator[Dict[str, Any]]: The stream events
+        """
+        message_id = None
+        chunks = []
+        start_time = time.time()
+        try:
+            answer_chain, rewrite_chain = await self._get_chains(model_name)
+            answer_chain = answer_chain.with_config(run_name='conversational_rag')
+
+            message_id = self._start_turn(session_id, question_input)
+
+            chat_history = ChatMessageHistory.string_message_chat_history(session_id)
+            rewrite_input = await rewrite_chain.ainvoke(
+                input={"input": question_input, "chat_history": chat_history}
+            )
+
+            # Retrieval runs here rather than inside the chain so the sources can be sent before the first token
+            docs = await self._retrieve(rewrite_input, collection_name)
+            yield {'event': 'sources', 'data': [doc.metadata for doc in docs]}
+
+            time_to_first_token = None
+            async for chunk in answer_chain.astream(
+                input={"input": question_input, "context": self._format_docs(docs)},
+                config={"configurable": {"session_id": session_id}}
+            ):
+                if not chunk:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = round(time.time() - start_time, 3)
+                chunks.append(chunk)
+                yield {'event': 'token', 'data': chunk}
+
+            response_time = round(time.time() - start_time, 3)
+            self.logger.info(f"Successfully streamed chat request in session {session_id} "
+                             f"time_to_first_token={time_to_first_token} response_time={response_time}")
+            yield {
+                'event': 'done',
+                'data': {
+                    'message_id': message_id,
+                    'response_time': response_time,
+                    'time_to_first_token': time_to_first_token,
+                }
+            }
+
+        except Exception as e:
+            self.logger.error(f"Failed to stream chat request: {str(e)}")
+            yield {'event': 'error', 'data': {'message': f"Failed to handle chat request: {str(e)}"}}
+
+        finally:
+            # Also reached when the client disconnects mid-answer, the partial answer is kept
+            if message_id is not None:
+                chat_service.update_assistant_response(
+                    updated_at=datetime.datetime.now(),
+                    message_id=message_id,
+                    content="".join(chunks),
+                    response_time=round(time.time() - start_time, 3)
+                )
+
 class ChatMessageHistory(LoggerMixin):
     """
     Utility class for working with chat message history
@@ -1,9 +1,11 @@
+import asyncio
 from typing import List, Dict, Any, Optional
 import numpy as np
-import torch
-from functools import lru_cache
+from src.utils.config import settings
 from src.utils.logger.custom_logging import LoggerMixin
-from src.helpers.model_loader_helper import ModelLoader, sentence_transformer, default_tokenizer
+from src.helpers.qdrant_connection_helper import QdrantConnection
+from src.helpers.model_loader_helper import ModelLoader
+from src.helpers.inference_backend_helper import inference_backend
 
 class RerankHandler(LoggerMixin):
     """Handler for reranking retrieved documents using local models instead of Triton Server.
@@ -21,190 +23,122 @@ class RerankHandler(LoggerMixin):
         """
         super().__init__()
         
-        if model_key is None:
-            # Use the singleton instance for better performance
-            self.model = sentence_transformer
-            self.model_name = "default"  # Just for logging
-        else:
-            # Load a specific model if requested
-            self.model = ModelLoader.get_sentence_transformer(model_key)
-            self.model_name = model_key
+        # Models are loaded on first use through the model registry, not when the handler is built
+        self.model_key = model_key
+        self.model_name = model_key or "default"  # Just for logging
             
         self.logger.info(f"Using reranker model: {self.model_name}")
-        
-        # Use the singleton tokenizer
-        self.tokenizer = default_tokenizer
-    
-    def tokenize_input(self, text: str) -> Dict[str, Any]:
-        """Tokenizes the input text and prepares it for the model.
-
-        Args:
-            text (str): The input text to be tokenized.
-
-        Returns:
-            Dict[str, Any]: The request body compatible with the original code structure.
-        """
-        # Keep the same interface as the original code
-        encoding = self.tokenizer(text, return_tensors='pt', padding=True, truncation=True)
-        
-        input_ids = encoding['input_ids'].numpy().tolist()  
-        attention_mask = encoding['attention_mask'].numpy().tolist()  
-        token_type_ids = encoding.get('token_type_ids', None)
-
-        # Format the same way as original code for compatibility
-        request_body = {
-            "inputs": [
-                {
-                    "name": "input_ids",
-                    "shape": [1, len(input_ids[0])],
-                    "datatype": "INT64",
-                    "data": input_ids
-                },
-                {
-                    "name": "attention_mask",
-                    "shape": [1, len(attention_mask[0])],
-                    "datatype": "INT64",
-                    "data": attention_mask
-                }
-            ]
-        }
-
-        if token_type_ids is not None:
-            request_body["inputs"].append({
-                "name": "token_type_ids",
-                "shape": [1, len(token_type_ids[0])],
-                "datatype": "INT64",
-                "data": token_type_ids.numpy().tolist()
-            })
-
-        return request_body
-
-    def request_ranking_triton_kserve(self, text_input: str) -> Dict[str, Any]:
-        """Gets embeddings for a text input using the local model.
-        
-        Replaces the original method that called Triton server.
-
-        Args:
-            text_input (str): The input text.
-
-        Returns:
-            Dict[str, Any]: A dictionary with embeddings in the same format as the original Triton response.
-        """
-        # Encode the text using the loaded model
-        with torch.no_grad():
-            embedding = self.model.encode(text_input, convert_to_numpy=True)
-        
-        # Return in the same format as the original Triton response
-        return {
-            'outputs': [
-                {
-                    'name': 'output',
-                    'data': embedding.tolist() if hasattr(embedding, 'tolist') else list(embedding)
-                }
-            ]
-        }
-
-    def cosine_similarity(self, vec_a: np.ndarray, vec_b: np.ndarray) -> float:
-        """Calculates the cosine similarity between two vectors.
-
-        Args:
-            vec_a (np.ndarray): First vector.
-            vec_b (np.ndarray): Second vector.
 
-        Returns:
-            float: The cosine similarity score.
-        """
-        dot_product = np.dot(vec_a, vec_b)
-        norm_a = np.linalg.norm(vec_a)
-        norm_b = np.linalg.norm(vec_b)
-        return dot_product / (norm_a * norm_b) if norm_a and norm_b else 0
-
-    def pad_or_truncate(self, embedding: List[float], target_size: int) -> List[float]:
-        """Pads or truncates the embedding to a specified target size.
-
-        Args:
-            embedding (List[float]): The embedding to be padded or truncated.
-            target_size (int): The desired size for the embedding.
+        # Used to score candidates by point id against the dense vectors already stored in Qdrant
+        self.qdrant_client = QdrantConnection()
+    
+    @property
+    def model(self):
+        return ModelLoader.get_sentence_transformer(self.model_key)
 
-        Returns:
-            List[float]: The modified embedding of target size.
-        """
-        if len(embedding) > target_size:
-            return embedding[:target_size]  # Truncate
-        elif len(embedding) < target_size:
-            return embedding + [0] * (target_size - len(embedding))  # Pad
-        return embedding
+    async def process_candidates(self, candidates: List, query: str, threshold: float,
+                           top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Processes candidate documents against a query and filters based on similarity scores.
 
-    def rerank_embeddings(self, embeddings: List[np.ndarray], query_embedding: np.ndarray, candidates: List) -> List[tuple]:
-        """Reranks embeddings based on their similarity to the query embedding.
+        The query and all candidates are encoded in one batched call (shared with concurrent requests
+        by the batch scheduler of the inference backend), scored with a single
+        normalised matrix-vector product and the top-k is selected with argpartition.
 
         Args:
-            embeddings (List[np.ndarray]): The candidate embeddings.
-            query_embedding (np.ndarray): The embedding of the query.
-            candidates (List): The candidate documents with doc_id attribute.
+            candidates (List): List of candidate documents with doc_id and content attributes.
+            query (str): The query string.
+            threshold (float): The minimum score for a candidate to be considered.
+            top_k (Optional[int]): Maximum number of results to return, all passing candidates if None.
 
         Returns:
-            List[tuple]: A list of ranked documents with their scores.
+            List[Dict[str, Any]]: Filtered candidates with their scores, highest score first.
         """
-        # Calculate similarity scores between query and candidate embeddings
-        scores = {}
-        for candidate, embedding in zip(candidates, embeddings):
-            scores[candidate.doc_id] = self.cosine_similarity(np.array(embedding), np.array(query_embedding))
-       
-        # Sort candidates based on scores in descending order
-        ranked_embeddings = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-     
-        return ranked_embeddings
-
-    def process_candidates(self, candidates: List, query: str, threshold: float) -> List[Dict[str, Any]]:
-        """Processes candidate documents against a query and filters based on similarity scores.
+        if not candidates:
+            return []
+
+        texts = [candidate.content for candidate in candidates]
+        texts.append(query)
+        embeddings = await inference_backend.encode(self.model_key, texts)
+
+        # Cosine similarity of unit vectors is their dot product
+        scores = embeddings[:-1] @ embeddings[-1]
+
+        return [
+            {
+                'doc_id': candidates[index].doc_id,
+                'score': float(scores[index]),
+                'content': candidates[index].content
+            }
+            for index in self._rank(scores, threshold, top_k)
+        ]
+
+    async def process_point_candidates(self, candidates: List, query: str, threshold: float,
+                                       collection_name: str = settings.QDRANT_COLLECTION_NAME,
+                                       top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Scores candidates given by Qdrant point id against the query, using their stored dense vectors.
+
+        The TEXT_EMBEDDING_MODEL vectors of all candidates are fetched with one retrieve call and compared
+        with the query embedding of the same model. Only ids unknown to the collection are encoded on the fly
+        from their `content`, unknown ids without content are dropped.
 
         Args:
-            candidates (List): List of candidate documents with doc_id and content attributes.
+            candidates (List): Candidates with point_id and optional content attributes.
             query (str): The query string.
             threshold (float): The minimum score for a candidate to be considered.
+            collection_name (str): Collection the point ids belong to.
+            top_k (Optional[int]): Maximum number of results to return, all passing candidates if None.
 
         Returns:
-            List[Dict[str, Any]]: Filtered candidates with their scores.
+            List[Dict[str, Any]]: Filtered candidates with their scores, highest score first.
         """
-        embeddings = []
-
-        # Get embeddings for each candidate
-        for candidate in candidates:
-            resp = self.request_ranking_triton_kserve(candidate.content)
-            embedding = resp.get('outputs', [{}])[0].get("data")
-            if embedding is not None:
-                embeddings.append(np.array(embedding))
-
-        # Get the query embedding
-        query_resp = self.request_ranking_triton_kserve(query)
-        query_embedding = np.array(query_resp.get('outputs', [{}])[0].get("data"))
-
-        # Determine the target size for padding
-        target_size = max(len(embedding) for embedding in embeddings) if embeddings else 0
-
-        # Pad or truncate embeddings to the target size
-        embeddings = [self.pad_or_truncate(embedding.tolist(), target_size) for embedding in embeddings]
-        query_embedding = self.pad_or_truncate(query_embedding.tolist(), target_size)
-
-        # Rerank the embeddings based on the query
-        ranked_results = self.rerank_embeddings(embeddings, query_embedding, candidates)
-
-        # Map the results to the desired output format
-        mapped_results = []
-        for doc_id, score in ranked_results:
-            for candidate in candidates:
-                if candidate.doc_id == doc_id:
-                    mapped_results.append({
-                        'doc_id': doc_id,
-                        'score': score,
-                        'content': candidate.content
-                    })
-                    break
-
-        # Filter results based on the similarity threshold
-        filtered_results = [item for item in mapped_results if item['score'] >= threshold]
-        return filtered_results
+        if not candidates:
+            return []
+
+        stored = await self.qdrant_client.retrieve_dense_vectors([candidate.point_id for candidate in candidates],
+                                                                 collection_name)
+        unknown = [candidate for candidate in candidates if candidate.point_id not in stored and candidate.content]
+        dropped = sum(1 for candidate in candidates if candidate.point_id not in stored and not candidate.content)
+        if dropped:
+            self.logger.warning(f'event=rerank-point-candidates collection={collection_name} '
+                                f'message="Dropped {dropped} unknown point ids without content."')
+
+        query_embeddings, unknown_embeddings = await asyncio.gather(
+            self.qdrant_client.embed_dense([query], is_query=True),
+            self.qdrant_client.embed_dense([candidate.content for candidate in unknown]) if unknown else asyncio.sleep(0, []),
+        )
+
+        scored_candidates = [
+            (candidate.point_id, stored[candidate.point_id][0], stored[candidate.point_id][1])
+            for candidate in candidates if candidate.point_id in stored
+        ]
+        scored_candidates.extend(
+            (candidate.point_id, embedding, candidate.content) for candidate, embedding in zip(unknown, unknown_embeddings)
+        )
+        if not scored_candidates:
+            return []
+
+        embeddings = np.asarray([vector for _, vector, _ in scored_candidates], dtype=float)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        query_embedding = np.asarray(query_embeddings[0], dtype=float)
+        scores = embeddings @ (query_embedding / max(np.linalg.norm(query_embedding), 1e-12))
+
+        return [
+            {
+                'point_id': scored_candidates[index][0],
+                'score': float(scores[index]),
+                'content': scored_candidates[index][2]
+            }
+            for index in self._rank(scores, threshold, top_k)
+        ]
+
+    @staticmethod
+    def _rank(scores: np.ndarray, threshold: float, top_k: Optional[int] = None) -> np.ndarray:
+        """Indices of the scores passing `threshold`, highest first, at most `top_k` of them."""
+        passing_indices = np.flatnonzero(scores >= threshold)
+        if top_k is not None and top_k < len(passing_indices):
+            top_indices = np.argpartition(-scores[passing_indices], top_k - 1)[:top_k]
+            passing_indices = passing_indices[top_indices]
+        return passing_indices[np.argsort(-scores[passing_indices], kind='stable')]
 
 # Create a singleton instance for default usage
 default_reranker = RerankHandler()
@@ -1,10 +1,14 @@
+import asyncio
+import functools
 from typing import List, Optional
 import numpy as np
 from src.utils.config import settings
 from langchain_core.documents import Document
 from src.helpers.qdrant_connection_helper import QdrantConnection
+from src.schemas.search import SearchProfile, get_search_profile
 from src.utils.logger.custom_logging import LoggerMixin
-from src.helpers.model_loader_helper import ModelLoader, flag_reranker
+from src.helpers.cache_helper import RerankScoreCache, rerank_score_cache
+from src.helpers.inference_backend_helper import inference_backend
 
 class SearchRetrieval(LoggerMixin):
     """
@@ -12,29 +16,82 @@ class SearchRetrieval(LoggerMixin):
     Uses singleton pattern to ensure models are loaded only once.
     """
     
-    def __init__(self, model_key: Optional[str] = None):
+    def __init__(self, model_key: Optional[str] = None, cascade: Optional[bool] = None):
         """
         Initialize the search retrieval handler.
         
         Args:
             model_key (Optional[str]): Key of reranking model in config.
                                       If None, uses the default model.
+            cascade (Optional[bool]): Prefilter the hits with the small RERANK_CASCADE_MODEL before
+                                      the main reranker, defaults to RERANK_CASCADE_ENABLED
         """
         super().__init__()
         self.qdrant_client = QdrantConnection()
         
-        if model_key is None:
-            # Use singleton instance for better performance
-            self.reranker = flag_reranker
-            self.model_name = "default"  # Just for logging
-        else:
-            # Load specific model if requested
-            self.reranker = ModelLoader.get_flag_reranker(model_key)
-            self.model_name = model_key
+        # The reranker is loaded on first use by the inference tasks, through the model registry
+        self.model_name = model_key or "default"  # Just for logging
             
         self.logger.info(f"Using FlagReranker model: {self.model_name}")
+        # Scored locally or by the inference server depending on INFERENCE_BACKEND, batched across requests either way
+        self.rerank_fn = functools.partial(inference_backend.rerank, model_key)
+
+        self.score_cache: RerankScoreCache = rerank_score_cache
+
+        self.cascade = settings.RERANK_CASCADE_ENABLED if cascade is None else cascade
+        if self.cascade:
+            cascade_model_key = settings.RERANK_CASCADE_MODEL
+            self.cascade_model_name = cascade_model_key
+            self.logger.info(f"Cascade reranking: {cascade_model_key} keeps the top {settings.RERANK_CASCADE_TOP_N} "
+                             f"hits for {self.model_name}")
+            self.cascade_rerank_fn = functools.partial(inference_backend.rerank, cascade_model_key)
+
+    async def _score_pairs(self, rerank_fn, model_name: str, collection_name: str,
+                           query_docs_pair: List[List[str]]) -> np.ndarray:
+        """
+        Score (query, passage) pairs, only the pairs missing from the score cache go to the model.
+        """
+        scores = await self.score_cache.get_or_compute_batch(model_name, collection_name, query_docs_pair,
+                                                             rerank_fn)
+        return np.asarray(scores, dtype=float)
+
+    async def _cascade_prefilter(self, candidates_per_query: List[List[Document]], queries: List[str],
+                                 collection_name: str = settings.QDRANT_COLLECTION_NAME) -> List[List[Document]]:
+        """
+        First stage of the cascade: score every candidate with the small cross-encoder and keep
+        the best RERANK_CASCADE_TOP_N of each query scoring at least RERANK_CASCADE_THRESHOLD.
+        
+        Args:
+            candidates_per_query (List[List[Document]]): Retrieved documents of each query
+            queries (List[str]): Query strings
+            collection_name (str): Collection the candidates come from, scopes the score cache
+            
+        Returns:
+            List[List[Document]]: Surviving documents of each query, best first
+        """
+        query_docs_pair = [
+            [query, candidate.page_content.strip()]
+            for query, candidates in zip(queries, candidates_per_query)
+            for candidate in candidates
+        ]
+        if not query_docs_pair:
+            return candidates_per_query
+
+        scores = await self._score_pairs(self.cascade_rerank_fn, self.cascade_model_name, collection_name,
+                                         query_docs_pair)
+
+        results = []
+        offset = 0
+        for candidates in candidates_per_query:
+            end = offset + len(candidates)
+            survivors = self._select_reranked_candidates(candidates, scores[offset:end],
+                                                         settings.RERANK_CASCADE_THRESHOLD)
+            results.append(survivors[:settings.RERANK_CASCADE_TOP_N])
+            offset = end
+        return results
     
-    def _query_retrieval_reranking(self, candidates: List[Document], query: str, threshold=0.06) -> List[Document]:
+    async def _query_retrieval_reranking(self, candidates: List[Document], query: str, threshold=0.06,
+                                         collection_name: str = settings.QDRANT_COLLECTION_NAME) -> List[Document]:
         """
         Rerank the candidate documents based on their relevance to the query.
         
@@ -42,42 +99,83 @@ class SearchRetrieval(LoggerMixin):
             candidates (List[Document]): List of retrieved documents
             query (str): Query string
             threshold (float): Minimum score threshold
+            collection_name (str): Collection the candidates come from, scopes the score cache
             
         Returns:
-            List[Document]: Reranked and filtered documents
+            List[Document]: Reranked and filtered documents, with the reranker score in metadata['rerank_score']
         """
+        if candidates and self.cascade:
+            candidates = (await self._cascade_prefilter([candidates], [query], collection_name))[0]
+
         if candidates:
-            query_docs_pair = []
-            for candidate in candidates:
-                query_docs_pair.append([query, candidate.page_content.strip()])
-
-            scores = self.reranker.compute_score(query_docs_pair, normalize=True)
-            if len(query_docs_pair) == 1:
-                scores = np.array([scores])
-            else:
-                scores = np.array(scores)
-            
-            # Sorted scores and indices
-            sorted_indices = sorted(range(len(scores)), key=lambda x: scores[x], reverse=True)
-            sorted_scores = [scores[i] for i in sorted_indices]
-            
-            filtered_indices = [index for index, score in zip(sorted_indices, sorted_scores) if score >= threshold]
-            rerank_content = [query_docs_pair[index][1] for index in filtered_indices]
-            
-            content_to_results_map = {candidate.page_content.strip(): candidate for candidate in candidates}
-            
-            final_results = [content_to_results_map[content] for content in rerank_content if content in content_to_results_map]
-            
-            return final_results
+            query_docs_pair = [[query, candidate.page_content.strip()] for candidate in candidates]
+            scores = await self._score_pairs(self.rerank_fn, self.model_name, collection_name, query_docs_pair)
+            return self._select_reranked_candidates(candidates, scores, threshold)
         
         return candidates
 
+    async def _batch_query_retrieval_reranking(self, candidates_per_query: List[List[Document]], queries: List[str],
+                                         threshold=0.06,
+                                         collection_name: str = settings.QDRANT_COLLECTION_NAME) -> List[List[Document]]:
+        """
+        Rerank the candidates of many queries with a single reranker call.
+        
+        Args:
+            candidates_per_query (List[List[Document]]): Retrieved documents of each query
+            queries (List[str]): Query strings
+            threshold (float): Minimum score threshold
+            collection_name (str): Collection the candidates come from, scopes the score cache
+            
+        Returns:
+            List[List[Document]]: Reranked and filtered documents of each query
+        """
+        if self.cascade:
+            candidates_per_query = await self._cascade_prefilter(candidates_per_query, queries, collection_name)
+
+        query_docs_pair = [
+            [query, candidate.page_content.strip()]
+            for query, candidates in zip(queries, candidates_per_query)
+            for candidate in candidates
+        ]
+        if not query_docs_pair:
+            return candidates_per_query
+
+        scores = await self._score_pairs(self.rerank_fn, self.model_name, collection_name, query_docs_pair)
+
+        results = []
+        offset = 0
+        for candidates in candidates_per_query:
+            end = offset + len(candidates)
+            results.append(self._select_reranked_candidates(candidates, scores[offset:end], threshold))
+            offset = end
+        return results
+
+    def _select_reranked_candidates(self, candidates: List[Document], scores, threshold: float) -> List[Document]:
+        """
+        Keep the candidates scoring at least `threshold`, highest score first.
+        Candidates are tracked by index so duplicated chunk texts keep their own metadata.
+        """
+        # compute_score returns a bare float for a single pair
+        scores = np.atleast_1d(np.asarray(scores, dtype=float))
+        passing_indices = np.flatnonzero(scores >= threshold)
+        ranked_indices = passing_indices[np.argsort(-scores[passing_indices], kind='stable')]
+
+        return [
+            Document(page_content=candidates[index].page_content,
+                     metadata={**candidates[index].metadata, 'rerank_score': float(scores[index])})
+            for index in ranked_indices
+        ]
+
 
     async def qdrant_retrieval(
             self, 
             query: str | dict,
             top_k: int = 5,
-            collection_name: str = settings.QDRANT_COLLECTION_NAME
+            collection_name: str = settings.QDRANT_COLLECTION_NAME,
+            search_profile: str | SearchProfile | None = None,
+            document_ids: Optional[List[str]] = None,
+            document_names: Optional[List[str]] = None,
+            extensions: Optional[List[str]] = None
         ) -> Optional[List[Document]]:
         """
         Retrieve documents from Qdrant, rerank them, and return the top results.
@@ -86,6 +184,11 @@ class SearchRetrieval(LoggerMixin):
             query (str | dict): Query string or dict with query field
             top_k (int): Number of top results to return
             collection_name (str): Name of the collection to search
+            search_profile (str | SearchProfile | None): Preset name ('fast', 'balanced', 'accurate')
+                                                         or explicit search tuning, balanced when None
+            document_ids (Optional[List[str]]): Only search chunks of these documents
+            document_names (Optional[List[str]]): Only search chunks of these file names
+            extensions (Optional[List[str]]): Only search chunks of these file extensions (pdf, docx, ...)
             
         Returns:
             Optional[List[Document]]: Retrieved and reranked documents
@@ -94,8 +197,14 @@ class SearchRetrieval(LoggerMixin):
             query = query.get('query')
 
         try:
-            docs = await self.qdrant_client.hybrid_search(query=query, collection_name=collection_name) 
-            docs = self._query_retrieval_reranking(docs, query, 0.3)
+            search_profile = get_search_profile(search_profile)
+            query_filter = self.qdrant_client.create_metadata_filter(document_ids=document_ids,
+                                                                     document_names=document_names,
+                                                                     extensions=extensions)
+            docs = await self.qdrant_client.hybrid_search(query=query, collection_name=collection_name,
+                                                          search_profile=search_profile,
+                                                          query_filter=query_filter) 
+            docs = await self._query_retrieval_reranking(docs, query, settings.RERANK_SCORE_THRESHOLD, collection_name)
             extended_docs = await self.qdrant_client.query_headers(docs, collection_name)
             self.logger.debug("############### docs ########### %s", docs)
             self.logger.debug("############### extended_docs ########### %s", extended_docs)
@@ -106,6 +215,51 @@ class SearchRetrieval(LoggerMixin):
                              f'error={e}')
             return []
 
+    async def qdrant_batch_retrieval(
+            self, 
+            queries: List[str],
+            top_k: int = 5,
+            collection_name: str = settings.QDRANT_COLLECTION_NAME,
+            search_profile: str | SearchProfile | None = None,
+            document_ids: Optional[List[str]] = None,
+            document_names: Optional[List[str]] = None,
+            extensions: Optional[List[str]] = None
+        ) -> List[List[Document]]:
+        """
+        Retrieve, rerank and expand the documents of many queries against one collection.
+        Embedding, search and reranking each run as one batched call instead of one call per query.
+        
+        Args:
+            queries (List[str]): Query strings
+            top_k (int): Number of top results to return per query
+            collection_name (str): Name of the collection to search
+            search_profile (str | SearchProfile | None): Preset name or explicit search tuning
+            document_ids, document_names, extensions (Optional[List[str]]): Filters pushed down into the search
+            
+        Returns:
+            List[List[Document]]: Retrieved and reranked documents, in the order of `queries`
+        """
+        try:
+            search_profile = get_search_profile(search_profile)
+            query_filter = self.qdrant_client.create_metadata_filter(document_ids=document_ids,
+                                                                     document_names=document_names,
+                                                                     extensions=extensions)
+            docs_per_query = await self.qdrant_client.hybrid_search_batch(queries=queries, collection_name=collection_name,
+                                                                          search_profile=search_profile,
+                                                                          query_filter=query_filter)
+            docs_per_query = await self._batch_query_retrieval_reranking(docs_per_query, queries,
+                                                                         settings.RERANK_SCORE_THRESHOLD,
+                                                                         collection_name)
+            extended_docs_per_query = await asyncio.gather(*[
+                self.qdrant_client.query_headers(docs, collection_name) for docs in docs_per_query
+            ])
+            return [extended_docs[:top_k] for extended_docs in extended_docs_per_query]
+        except Exception as e:
+            self.logger.error('event=batch-query-relevant-context-in-database '
+                             'message="Failed to retrieve relevant context from database"'
+                             f'error={e}')
+            return []
+
 # Create a singleton instance for default usage
 default_search_retrieval = SearchRetrieval()
 
@@ -1,5 +1,6 @@
 from src.utils.logger.custom_logging import LoggerMixin
 from src.helpers.qdrant_connection_helper import QdrantConnection
+from src.helpers.collection_registry_helper import collection_registry, MISSING
 from src.schemas.response import BasicResponse
 from src.database.models.schemas import Users
 from src.database.services.collection_management_service import CollectionManagementService
@@ -10,14 +11,26 @@ class VectorStoreQdrant(LoggerMixin):
         self.qdrant = QdrantConnection()
         self.collection_service = CollectionManagementService()
 
+    def _is_collection_owner(self, user: Users, collection_name: str) -> bool:
+        owner_key = f"owner:{user.id}"
+        is_owner = collection_registry.get(collection_name, owner_key)
+        if is_owner is MISSING:
+            is_owner = self.collection_service.is_collection_owner(
+                user_id=user.id, 
+                collection_name=collection_name
+            )
+            collection_registry.set(collection_name, owner_key, is_owner)
+        return is_owner
+
     def create_qdrant_collection(self, collection_name: str, user: Users):
         resp = BasicResponse(status="Success",
                              message="create qdrant collection success.",
                              data=collection_name)
         try:
-            if not self.qdrant.client.collection_exists(collection_name=collection_name):
+            if not self.qdrant.collection_exists(collection_name=collection_name, use_cache=False):
                 # 1. Tạo collection trong Qdrant vector database
                 is_created = self.qdrant._create_collection(collection_name)
+                collection_registry.invalidate(collection_name)
                 
                 if is_created:
                     # 2. Lưu metadata vào PostgreSQL
@@ -53,12 +66,9 @@ class VectorStoreQdrant(LoggerMixin):
     def delete_qdrant_collection(self, collection_name: str, user: Users):
         try:
             # 1. Kiểm tra xem collection có tồn tại trong Qdrant không
-            if self.qdrant.client.collection_exists(collection_name=collection_name):
+            if self.qdrant.collection_exists(collection_name=collection_name, use_cache=False):
                 # 2. Kiểm tra quyền sở hữu qua PostgreSQL
-                is_owner = self.collection_service.is_collection_owner(
-                    user_id=user.id, 
-                    collection_name=collection_name
-                )
+                is_owner = self._is_collection_owner(user, collection_name)
                 
                 # Admin luôn có quyền xóa bất kỳ collection nào
                 if user.role == 'ADMIN':
@@ -67,6 +77,7 @@ class VectorStoreQdrant(LoggerMixin):
                 if is_owner:
                     # 3. Xóa collection từ Qdrant
                     self.qdrant._delete_collection(collection_name)
+                    collection_registry.invalidate(collection_name)
                     
                     # 4. Xóa metadata từ PostgreSQL
                     try:
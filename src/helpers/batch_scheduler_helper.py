@@ -0,0 +1,169 @@
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+from src.helpers.inference_executor_helper import InferenceBusyError, inference_executor
+
+
+class DynamicBatchScheduler(LoggerMixin):
+    """
+    Cross-request micro-batching in front of a model.
+
+    Items submitted by concurrent requests are queued and flushed to `batch_fn` as one batch once
+    `max_batch_size` items are waiting or `max_wait_ms` has passed since the first queued request.
+    Each caller gets back the results of its own items, in order.
+
+    Up to `max_concurrent_batches` batches run at once (one per inference pool worker by default), so a
+    full batch does not wait for the previous one to finish. At most `max_pending` requests are admitted,
+    further callers wait up to `queue_timeout` seconds and then get InferenceBusyError.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = settings.RERANK_MAX_BATCH_SIZE,
+                 max_wait_ms: float = settings.RERANK_MAX_WAIT_MS,
+                 max_concurrent_batches: int = inference_executor.max_workers,
+                 max_pending: int = settings.INFERENCE_MAX_PENDING,
+                 queue_timeout: float = settings.INFERENCE_QUEUE_TIMEOUT):
+        super().__init__()
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._admission: Optional[asyncio.Semaphore] = None
+        self._batch_slots: Optional[asyncio.Semaphore] = None
+        # References to the running flushes, so they are not garbage collected mid-way
+        self._flushes: set = set()
+        self.pending = 0
+        self.rejected = 0
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Counter = Counter()
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        """
+        Queue `items` for the next batch and wait for their results.
+
+        Args:
+            items (List[Any]): Model inputs of one request, e.g. (query, passage) pairs
+
+        Returns:
+            List[Any]: One result per item, in the order of `items`
+
+        Raises:
+            InferenceBusyError: If no admission slot frees up within `queue_timeout` seconds
+        """
+        if not items:
+            return []
+        self._ensure_worker()
+        admission = self._admission
+        try:
+            await asyncio.wait_for(admission.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise InferenceBusyError(f"Batch scheduler {self.name} saturated, {self.pending} requests pending")
+
+        self.pending += 1
+        try:
+            future = self._loop.create_future()
+            await self._queue.put((items, future))
+            return await future
+        finally:
+            self.pending -= 1
+            admission.release()
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            if self._loop is not loop:
+                self._admission = asyncio.Semaphore(self.max_pending)
+                self._batch_slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for a free slot first, requests arriving meanwhile then end up in this batch
+            await self._batch_slots.acquire()
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = self._loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request[0])
+            flush = self._loop.create_task(self._flush(batch, size))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flush_done)
+
+    def _flush_done(self, flush: asyncio.Task) -> None:
+        self._flushes.discard(flush)
+        self._batch_slots.release()
+
+    async def _flush(self, batch: List[Tuple[List[Any], asyncio.Future]], size: int) -> None:
+        inputs = [item for items, _ in batch for item in items]
+        self.batches += 1
+        self.items += size
+        self.batch_sizes[size] += 1
+        try:
+            results = await inference_executor.run(self.batch_fn, inputs)
+        except Exception as e:
+            self.logger.error(f'event=batch-scheduler-flush scheduler={self.name} '
+                              f'message="Batch inference failed." error="{str(e)}"')
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for items, future in batch:
+            end = offset + len(items)
+            if not future.done():
+                future.set_result(results[offset:end])
+            offset = end
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'pending': self.pending,
+            'rejected': self.rejected,
+            'batches_in_flight': len(self._flushes),
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'batch_sizes': dict(sorted(self.batch_sizes.items())),
+        }
+
+
+_schedulers: Dict[str, DynamicBatchScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_batch_scheduler(name: str, batch_fn: Callable[[List[Any]], Sequence[Any]]) -> DynamicBatchScheduler:
+    """
+    Get the process-wide scheduler registered under `name`, creating it with `batch_fn` on first use.
+    Sharing one scheduler per model is what lets concurrent requests end up in the same batch.
+    """
+    with _schedulers_lock:
+        if name not in _schedulers:
+            _schedulers[name] = DynamicBatchScheduler(name=name, batch_fn=batch_fn)
+        return _schedulers[name]
+
+
+def get_batch_scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: scheduler.stats() for name, scheduler in _schedulers.items()}
@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+from src.helpers.collection_registry_helper import collection_registry
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with hit/miss counters.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class QueryEmbeddingCache(LoggerMixin):
+    """
+    Cache for query vectors (dense, BM25 and ColBERT) keyed on the model name and the normalised query text.
+    An optional SQLite tier in `persist_dir` keeps the vectors across restarts.
+
+    The SQLite connection is opened lazily by each process: a connection must never cross fork(),
+    and the instance is created at import time, i.e. in the preload master before it forks the workers.
+    Only the in-memory LRU is used on the event loop, disk reads run in a thread and disk writes in the background.
+    """
+
+    def __init__(self, maxsize: int = settings.QUERY_EMBEDDING_CACHE_SIZE,
+                 persist_dir: Optional[str] = settings.QUERY_EMBEDDING_CACHE_DIR):
+        super().__init__()
+        self.memory = LRUCache(maxsize=maxsize)
+        self.disk_hits = 0
+        self.persist_dir = persist_dir
+        self._disk_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        # References to the running background writes, so they are not garbage collected mid-way
+        self._pending_writes: set = set()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_disk)
+
+    def _reset_disk(self) -> None:
+        # In a forked child the inherited connection and lock belong to the parent, drop them without closing
+        self._disk_lock = threading.Lock()
+        self._disk = None
+
+    def _get_disk(self) -> Optional[sqlite3.Connection]:
+        if not self.persist_dir:
+            return None
+        with self._disk_lock:
+            if self._disk is None:
+                os.makedirs(self.persist_dir, exist_ok=True)
+                disk = sqlite3.connect(os.path.join(self.persist_dir, 'query_embedding_cache.sqlite'),
+                                       check_same_thread=False, timeout=30)
+                # Several worker processes share the file
+                disk.execute('PRAGMA journal_mode=WAL')
+                disk.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, value BLOB)')
+                disk.commit()
+                self._disk = disk
+        return self._disk
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+    async def get_or_compute_batch(self, model_name: str, texts: List[str],
+                                   compute_batch: Callable[[List[str]], Awaitable[List[Any]]]) -> List[Any]:
+        """
+        Return the cached vectors of `texts` for `model_name`, all misses are computed with a single `compute_batch` call.
+
+        Args:
+            model_name (str): Embedding model name, part of the cache key
+            texts (List[str]): Query texts
+            compute_batch (Callable[[List[str]], Awaitable[List[Any]]]): Coroutine function producing the vectors of the missed texts
+
+        Returns:
+            List[Any]: The query vectors, in the order of `texts`
+        """
+        keys = [f"{model_name}:{self.normalize(text)}" for text in texts]
+        values = {}
+        missed = {}
+        for key, text in zip(keys, texts):
+            if key in values or key in missed:
+                continue
+            value = self.memory.get(key)
+            if value is None:
+                missed[key] = text
+            else:
+                values[key] = value
+
+        if missed and self.persist_dir:
+            # One SELECT for all memory misses, in a thread so a busy database never blocks the event loop
+            for key, value in (await asyncio.to_thread(self._disk_get_many, list(missed))).items():
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                values[key] = value
+                del missed[key]
+
+        if missed:
+            computed = dict(zip(missed.keys(), await compute_batch(list(missed.values()))))
+            for key, value in computed.items():
+                values[key] = value
+                self.memory.set(key, value)
+            if self.persist_dir:
+                self._schedule_disk_write(computed)
+
+        return [values[key] for key in keys]
+
+    def _schedule_disk_write(self, items: Dict[str, Any]) -> None:
+        # The caller already has its vectors, the write only has to land eventually
+        task = asyncio.create_task(asyncio.to_thread(self._disk_set_many, items))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, Any]:
+        try:
+            disk = self._get_disk()
+            if disk is None:
+                return {}
+            rows = []
+            with self._disk_lock:
+                # Stay under SQLite's limit on bound parameters
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows.extend(disk.execute(
+                        f"SELECT key, value FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall())
+            return {key: pickle.loads(value) for key, value in rows}
+        except Exception as e:
+            self.logger.error(f'event=query-embedding-cache-read message="Read from disk cache failed." error="{str(e)}"')
+            return {}
+
+    def _disk_set_many(self, items: Dict[str, Any]) -> None:
+        try:
+            disk = self._get_disk()
+            if disk is None:
+                return
+            rows = [(key, pickle.dumps(value)) for key, value in items.items()]
+            with self._disk_lock:
+                disk.executemany('INSERT OR REPLACE INTO embeddings (key, value) VALUES (?, ?)', rows)
+                disk.commit()
+        except Exception as e:
+            self.logger.error(f'event=query-embedding-cache-write message="Write to disk cache failed." error="{str(e)}"')
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.memory.stats()
+        stats['disk_hits'] = self.disk_hits
+        stats['persistent'] = bool(self.persist_dir)
+        return stats
+
+
+class RerankScoreCache(LoggerMixin):
+    """
+    Cache for cross-encoder scores keyed on the reranker model, the collection, the normalised query
+    and a content hash of the passage.
+    Invalidating a collection bumps its generation, so its old entries are never read again and age out of the LRU.
+    """
+
+    def __init__(self, maxsize: int = settings.RERANK_SCORE_CACHE_SIZE):
+        super().__init__()
+        self.memory = LRUCache(maxsize=maxsize)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def invalidate_collection(self, collection_name: str) -> None:
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+
+    def _key(self, model_name: str, collection_name: str, generation: int, query: str, passage: str) -> Tuple:
+        passage_hash = hashlib.blake2b(passage.encode('utf-8'), digest_size=16).hexdigest()
+        return model_name, collection_name, generation, QueryEmbeddingCache.normalize(query), passage_hash
+
+    async def get_or_compute_batch(self, model_name: str, collection_name: str, query_docs_pair: List[List[str]],
+                                   compute_batch: Callable[[List[List[str]]], Awaitable[Any]]) -> List[float]:
+        """
+        Return the scores of (query, passage) pairs, only the missed pairs are sent to `compute_batch`.
+
+        Args:
+            model_name (str): Reranker model id, part of the cache key
+            collection_name (str): Collection the passages come from
+            query_docs_pair (List[List[str]]): Pairs to score
+            compute_batch (Callable[[List[List[str]]], Awaitable[Any]]): Coroutine function scoring the missed pairs
+
+        Returns:
+            List[float]: One score per pair, in the order of `query_docs_pair`
+        """
+        with self._lock:
+            generation = self._generations.get(collection_name, 0)
+        keys = [self._key(model_name, collection_name, generation, query, passage) for query, passage in query_docs_pair]
+        scores = {}
+        missed = {}
+        for key, pair in zip(keys, query_docs_pair):
+            if key in scores or key in missed:
+                continue
+            score = self.memory.get(key)
+            if score is None:
+                missed[key] = pair
+            else:
+                scores[key] = score
+
+        if missed:
+            for key, score in zip(missed.keys(), await compute_batch(list(missed.values()))):
+                scores[key] = float(score)
+                self.memory.set(key, float(score))
+
+        return [scores[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.memory.stats()
+
+
+# Create singleton instances shared by every QdrantConnection and SearchRetrieval
+query_embedding_cache = QueryEmbeddingCache()
+rerank_score_cache = RerankScoreCache()
+collection_registry.subscribe(rerank_score_cache.invalidate_collection)
@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+
+# Marker for a missing or expired registry entry, so cached falsy values stay distinguishable
+MISSING = object()
+
+
+class CollectionRegistry(LoggerMixin):
+    """
+    In-process TTL cache of collection facts: existence, vector config, point count and ownership.
+    Entries are dropped on expiry or explicitly through `invalidate` by the create, delete and ingest paths.
+    Other caches depending on a collection's content can `subscribe` to these invalidations.
+    """
+
+    def __init__(self, ttl: float = settings.COLLECTION_REGISTRY_TTL):
+        super().__init__()
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """
+        Call `listener(collection_name)` whenever a collection is invalidated.
+        """
+        self._listeners.append(listener)
+
+    def get(self, collection_name: str, key: str) -> Any:
+        """
+        Get a cached fact of a collection.
+
+        Args:
+            collection_name (str): Name of the collection
+            key (str): Fact name, e.g. 'exists', 'config', 'points_count' or 'owner:<user_id>'
+
+        Returns:
+            Any: The cached value, or MISSING when absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get((collection_name, key))
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[(collection_name, key)]
+                return MISSING
+            return value
+
+    def set(self, collection_name: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[(collection_name, key)] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self, collection_name: str) -> None:
+        """
+        Drop every cached fact of a collection.
+        """
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == collection_name]:
+                del self._entries[entry_key]
+        for listener in self._listeners:
+            listener(collection_name)
+        self.logger.debug(f"Invalidated collection registry entries of {collection_name}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Create a singleton instance shared by every QdrantConnection
+collection_registry = CollectionRegistry()
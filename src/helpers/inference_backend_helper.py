@@ -0,0 +1,194 @@
+import functools
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+from fastembed.sparse.sparse_embedding_base import SparseEmbedding
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+from src.helpers.inference_executor_helper import InferenceBusyError, inference_executor
+from src.helpers.batch_scheduler_helper import get_batch_scheduler
+from src.helpers import inference_tasks_helper as inference_tasks
+
+# Model names exposed by the inference server, see src/inference_server.py
+KSERVE_MODELS = ('query_embed', 'passage_embed', 'rerank', 'encode')
+
+
+class LocalInferenceBackend(LoggerMixin):
+    """
+    Runs the models in this process, through the inference pool.
+    Reranking and sentence encoding are micro-batched across concurrent requests. With `batch_embeddings`
+    the query and passage embeddings are as well, which is what the inference server uses.
+    """
+
+    def __init__(self, batch_embeddings: bool = False):
+        super().__init__()
+        self.batch_embeddings = batch_embeddings
+
+    async def query_embed(self, kind: str, texts: List[str]) -> List[Any]:
+        if self.batch_embeddings:
+            scheduler = get_batch_scheduler(f"query_embed:{kind}", functools.partial(inference_tasks.query_embed, kind))
+            return await scheduler.submit(texts)
+        return await inference_executor.run(inference_tasks.query_embed, kind, texts)
+
+    async def passage_embed(self, kind: str, texts: List[str]) -> List[Any]:
+        if self.batch_embeddings:
+            scheduler = get_batch_scheduler(f"passage_embed:{kind}", functools.partial(inference_tasks.passage_embed, kind))
+            return await scheduler.submit(texts)
+        return await inference_executor.run(inference_tasks.passage_embed, kind, texts)
+
+    async def rerank(self, model_key: Optional[str], query_docs_pair: List[List[str]]) -> np.ndarray:
+        # Shared per model, so pairs of concurrent requests are scored in one batch in the inference pool
+        scheduler = get_batch_scheduler(f"cross_encoder:{model_key or 'default'}",
+                                        functools.partial(inference_tasks.compute_rerank_scores, model_key))
+        return np.asarray(await scheduler.submit(query_docs_pair), dtype=float)
+
+    async def encode(self, model_key: Optional[str], texts: List[str]) -> np.ndarray:
+        scheduler = get_batch_scheduler(f"sentence_encoder:{model_key or 'default'}",
+                                        functools.partial(inference_tasks.encode_texts, model_key))
+        return np.asarray(await scheduler.submit(texts))
+
+    async def aclose(self) -> None:
+        pass
+
+
+class KServeInferenceBackend(LoggerMixin):
+    """
+    Calls the models hosted by the inference server over the KServe v2 HTTP protocol, through one pooled
+    async client. Batching happens in the server, across all API workers.
+    """
+
+    def __init__(self, url: str = settings.INFERENCE_SERVER_URL,
+                 pool_size: int = settings.INFERENCE_SERVER_POOL_SIZE,
+                 timeout: float = settings.INFERENCE_SERVER_TIMEOUT):
+        super().__init__()
+        self.url = url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created on first use, inside the worker process and its event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._client
+
+    async def infer(self, model_name: str, inputs: List[Dict[str, Any]],
+                    parameters: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+        """
+        Send one KServe v2 inference request.
+
+        Args:
+            model_name (str): One of KSERVE_MODELS
+            inputs (List[Dict[str, Any]]): KServe v2 input tensors, see `bytes_tensor`
+            parameters (Optional[Dict[str, Any]]): Request parameters, e.g. {'kind': 'dense'}
+
+        Returns:
+            Dict[str, np.ndarray]: Output tensors by name, reshaped to their shape
+        """
+        payload = {'inputs': inputs, 'parameters': {key: value for key, value in (parameters or {}).items()
+                                                    if value is not None}}
+        response = await self._get_client().post(f'/v2/models/{model_name}/infer', json=payload)
+        if response.status_code == 503:
+            raise InferenceBusyError(response.json().get('error', 'Inference server busy'))
+        response.raise_for_status()
+        return decode_outputs(response.json()['outputs'])
+
+    async def query_embed(self, kind: str, texts: List[str]) -> List[Any]:
+        outputs = await self.infer('query_embed', [bytes_tensor('text', texts)], {'kind': kind})
+        return unpack_embeddings(kind, outputs)
+
+    async def passage_embed(self, kind: str, texts: List[str]) -> List[Any]:
+        outputs = await self.infer('passage_embed', [bytes_tensor('text', texts)], {'kind': kind})
+        return unpack_embeddings(kind, outputs)
+
+    async def rerank(self, model_key: Optional[str], query_docs_pair: List[List[str]]) -> np.ndarray:
+        outputs = await self.infer('rerank', [bytes_tensor('query', [pair[0] for pair in query_docs_pair]),
+                                              bytes_tensor('passage', [pair[1] for pair in query_docs_pair])],
+                                   {'model_key': model_key})
+        return outputs['scores'].astype(float)
+
+    async def encode(self, model_key: Optional[str], texts: List[str]) -> np.ndarray:
+        outputs = await self.infer('encode', [bytes_tensor('text', texts)], {'model_key': model_key})
+        return outputs['embedding']
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def bytes_tensor(name: str, texts: List[str]) -> Dict[str, Any]:
+    return {'name': name, 'shape': [len(texts)], 'datatype': 'BYTES', 'data': list(texts)}
+
+
+def numeric_tensor(name: str, array: np.ndarray, datatype: str) -> Dict[str, Any]:
+    return {'name': name, 'shape': list(array.shape), 'datatype': datatype, 'data': array.ravel().tolist()}
+
+
+def decode_outputs(outputs: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    dtypes = {'FP32': np.float32, 'FP64': np.float64, 'INT64': np.int64}
+    return {
+        output['name']: np.asarray(output['data'], dtype=dtypes.get(output['datatype'])).reshape(output['shape'])
+        for output in outputs
+    }
+
+
+def pack_embeddings(kind: str, embeddings: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Encode the embeddings of one model kind as KServe output tensors.
+    Dense vectors are one [N, D] tensor. BM25 sparse vectors and ColBERT multivectors are ragged, they are
+    flattened and sent with an `offsets` tensor marking where each item starts ([N + 1] values).
+    """
+    if kind == 'dense':
+        return [numeric_tensor('embedding', np.asarray(embeddings, dtype=np.float32), 'FP32')]
+
+    if kind == 'sparse':
+        lengths = [len(embedding.indices) for embedding in embeddings]
+        indices = np.concatenate([embedding.indices for embedding in embeddings]) if embeddings else np.empty(0)
+        values = np.concatenate([embedding.values for embedding in embeddings]) if embeddings else np.empty(0)
+        return [
+            numeric_tensor('indices', indices.astype(np.int64), 'INT64'),
+            numeric_tensor('values', values.astype(np.float32), 'FP32'),
+            numeric_tensor('offsets', np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64), 'INT64'),
+        ]
+
+    lengths = [len(embedding) for embedding in embeddings]
+    flat = np.concatenate(embeddings).astype(np.float32) if embeddings else np.empty((0, 0), dtype=np.float32)
+    return [
+        numeric_tensor('embedding', flat, 'FP32'),
+        numeric_tensor('offsets', np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64), 'INT64'),
+    ]
+
+
+def unpack_embeddings(kind: str, outputs: Dict[str, np.ndarray]) -> List[Any]:
+    """
+    Inverse of `pack_embeddings`, returns the same objects as the local fastembed models.
+    """
+    if kind == 'dense':
+        return list(outputs['embedding'])
+
+    offsets = outputs['offsets']
+    if kind == 'sparse':
+        return [
+            SparseEmbedding(values=outputs['values'][start:end], indices=outputs['indices'][start:end])
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+    return [outputs['embedding'][start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def create_inference_backend(backend: str = settings.INFERENCE_BACKEND):
+    if backend == 'local':
+        return LocalInferenceBackend()
+    if backend == 'kserve':
+        return KServeInferenceBackend()
+    raise ValueError(f"Unsupported inference backend {backend}, expected 'local' or 'kserve'")
+
+
+# Create a singleton instance shared by every handler
+inference_backend = create_inference_backend()
@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+
+
+class InferenceBusyError(Exception):
+    """Raised when the inference pool stays saturated for longer than the queue timeout."""
+
+
+def _limit_intra_op_threads(num_threads: int) -> None:
+    # Without a cap every concurrent torch call spreads over all cores and they thrash each other
+    if num_threads > 0:
+        import torch
+        torch.set_num_threads(num_threads)
+
+
+class InferenceExecutor(LoggerMixin):
+    """
+    Dedicated, size-limited pool for CPU-bound model inference.
+    Keeps embedding and reranking work off the event-loop thread.
+
+    'thread' mode shares the models of the API process, 'process' mode runs tasks in worker processes
+    that load their own models, which frees the event loop from the GIL entirely. In process mode
+    `func` and its arguments must be picklable (module-level functions such as the ones in
+    `inference_tasks_helper`).
+    At most `max_pending` calls are admitted at once, further callers wait up to `queue_timeout`
+    seconds for a slot and then get InferenceBusyError.
+    """
+
+    def __init__(self,
+                 mode: str = settings.INFERENCE_EXECUTOR_MODE,
+                 max_workers: int = settings.INFERENCE_EXECUTOR_WORKERS,
+                 intra_op_threads: int = settings.INFERENCE_INTRA_OP_THREADS,
+                 max_pending: int = settings.INFERENCE_MAX_PENDING,
+                 queue_timeout: float = settings.INFERENCE_QUEUE_TIMEOUT):
+        super().__init__()
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unsupported inference executor mode {mode}, expected 'thread' or 'process'")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.intra_op_threads = intra_op_threads
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing this module never starts threads or processes
+        if self._executor is None:
+            if self.mode == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_limit_intra_op_threads,
+                                                     initargs=(self.intra_op_threads,))
+            else:
+                _limit_intra_op_threads(self.intra_op_threads)
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+            self.logger.info(f"Started {self.mode} inference executor with {self.max_workers} workers")
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        return self._semaphore
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run `func(*args, **kwargs)` in the inference pool and await its result.
+        """
+        semaphore = self._get_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise InferenceBusyError(f"Inference pool saturated, {self.pending} calls pending")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+        finally:
+            self.pending -= 1
+            semaphore.release()
+
+    async def warmup(self, func: Callable[[], Any]) -> Any:
+        """
+        Run the model warmup task `func` where inference happens.
+        In thread mode the models are shared, so one call is enough. In process mode one call per worker
+        is submitted at once, which starts every worker process and loads the models in each (best effort:
+        the pool decides which worker runs which call, repeated loads in a worker are no-ops).
+        """
+        if self.mode == 'thread':
+            return await self.run(func)
+        results = await asyncio.gather(*[self.run(func) for _ in range(self.max_workers)])
+        return results[0]
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': self.pending,
+            'rejected': self.rejected,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Create a singleton instance shared by every handler
+inference_executor = InferenceExecutor()
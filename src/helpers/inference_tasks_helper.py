@@ -0,0 +1,93 @@
+from typing import Any, List, Optional
+
+import numpy as np
+
+from src.utils.config import settings
+from src.helpers.model_loader_helper import ModelLoader
+from src.helpers.model_registry_helper import model_registry
+from src.helpers.text_preprocess_helper import EMBEDDING_MODEL_SPECS
+
+# Module-level inference entry points for the InferenceExecutor.
+# Models are resolved by key inside the process running the task, so the same call works
+# in 'thread' mode (shared models) and in 'process' mode (models loaded once per worker process).
+# Each task holds its model through the registry, so the model cannot be evicted mid-call.
+
+
+def query_embed(model_kind: str, texts: List[str]) -> List[Any]:
+    with model_registry.acquire(*EMBEDDING_MODEL_SPECS[model_kind]) as model:
+        return list(model.query_embed(texts))
+
+
+def passage_embed(model_kind: str, texts: List[str]) -> List[Any]:
+    with model_registry.acquire(*EMBEDDING_MODEL_SPECS[model_kind]) as model:
+        return list(model.passage_embed(texts))
+
+
+def length_buckets(lengths: List[int], max_size: int, max_tokens: int) -> List[np.ndarray]:
+    """
+    Group item indices into batches of similar token length.
+    Items are sorted by length and a bucket is closed once it holds `max_size` items or padding
+    every item to the longest one would exceed `max_tokens`.
+    """
+    buckets = []
+    bucket = []
+    for index in np.argsort(lengths, kind='stable'):
+        # Sorted ascending, so the item being added is the longest of the bucket
+        if bucket and (len(bucket) == max_size or (len(bucket) + 1) * lengths[index] > max_tokens):
+            buckets.append(np.asarray(bucket))
+            bucket = []
+        bucket.append(index)
+    if bucket:
+        buckets.append(np.asarray(bucket))
+    return buckets
+
+
+def score_pairs_bucketed(reranker: Any, query_docs_pair: List[List[str]],
+                         max_length: int = settings.RERANK_MAX_LENGTH,
+                         max_size: int = settings.RERANK_BUCKET_MAX_SIZE,
+                         max_tokens: int = settings.RERANK_BUCKET_MAX_TOKENS) -> np.ndarray:
+    """
+    Score (query, passage) pairs with a cross-encoder, one call per length bucket, so short pairs
+    are not padded to the longest chunk of the batch.
+
+    Args:
+        reranker (Any): FlagReranker or OnnxReranker
+        query_docs_pair (List[List[str]]): Pairs to score
+        max_length (int): Token limit of a pair, longer pairs are truncated
+        max_size (int): Max pairs per bucket
+        max_tokens (int): Max padded tokens per bucket
+
+    Returns:
+        np.ndarray: Normalised scores, in the order of `query_docs_pair`
+    """
+    lengths = [
+        len(input_ids) for input_ids in reranker.tokenizer(
+            [pair[0] for pair in query_docs_pair], [pair[1] for pair in query_docs_pair],
+            truncation=True, max_length=max_length,
+            return_attention_mask=False, return_token_type_ids=False)['input_ids']
+    ]
+
+    scores = np.empty(len(query_docs_pair), dtype=float)
+    for bucket in length_buckets(lengths, max_size, max_tokens):
+        bucket_scores = reranker.compute_score([query_docs_pair[index] for index in bucket], batch_size=len(bucket),
+                                               max_length=max_length, normalize=True)
+        # compute_score returns a bare float for a single pair
+        scores[bucket] = np.atleast_1d(np.asarray(bucket_scores, dtype=float))
+    return scores
+
+
+def compute_rerank_scores(model_key: Optional[str], query_docs_pair: List[List[str]]) -> np.ndarray:
+    with ModelLoader.use_flag_reranker(model_key) as reranker:
+        return score_pairs_bucketed(reranker, query_docs_pair)
+
+
+def encode_texts(model_key: Optional[str], texts: List[str]) -> np.ndarray:
+    import torch
+
+    with torch.no_grad(), ModelLoader.use_sentence_transformer(model_key) as model:
+        return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+
+
+def warmup_models() -> dict:
+    # Loads the default models of the process running the task, see ModelRegistry.warmup
+    return model_registry.warmup()
@@ -1,81 +1,238 @@
-from functools import lru_cache
-from typing import Dict, Any, Optional
-import torch
+import inspect
+import os
+import shutil
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Dict, List, Optional, Tuple, Union
+import numpy as np
 from transformers import AutoTokenizer
-from sentence_transformers import SentenceTransformer
-from FlagEmbedding import FlagReranker
 from src.utils.config import settings
 from src.utils.config_loader import ConfigReaderInstance
 from src.utils.logger.custom_logging import LoggerMixin
+from src.helpers.model_registry_helper import model_registry, ort_intra_op_threads
+
+# torch, sentence-transformers and FlagEmbedding are imported by the loaders, so importing this module stays cheap
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from FlagEmbedding import FlagReranker
 
 # Load configuration
 config = ConfigReaderInstance.yaml.read_config_from_file(settings.MODEL_CONFIG_FILENAME)
 rerank_config = config.get('RERANKING_MODEL', {})
+rerank_backend_config = config.get('RERANKING_BACKEND', {})
+# Allowlist: only the model names configured in model_config.yaml can be loaded
+ALLOWED_MODEL_NAMES = {
+    model_name
+    for section in ('RERANKING_MODEL', 'EMBEDDING_MODEL')
+    for model_name in (config.get(section) or {}).values()
+}
 
 # Define cache directory for models
 CACHE_DIR = "/app/cache"
+ONNX_CACHE_DIR = os.path.join(CACHE_DIR, "onnx")
+
+RERANK_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+class OnnxReranker(LoggerMixin):
+    """
+    Cross-encoder reranker running on ONNX Runtime (CPU), optionally with int8 dynamic quantisation.
+    Exposes the same `compute_score` call as FlagReranker so both backends are interchangeable.
+
+    The model is exported from its Hugging Face checkpoint on first use and kept under
+    ONNX_CACHE_DIR, later loads reuse the exported files.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, max_length: int = 512):
+        super().__init__()
+        import onnxruntime as ort
+
+        self.model_name = model_name
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=CACHE_DIR)
+        model_path = self._ensure_onnx_model(model_name, quantize)
+
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ort_intra_op_threads():
+            session_options.intra_op_num_threads = ort_intra_op_threads()
+        self.session = ort.InferenceSession(model_path, sess_options=session_options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def _ensure_onnx_model(self, model_name: str, quantize: bool) -> str:
+        model_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "--"))
+        fp32_path = os.path.join(model_dir, "model.onnx")
+        int8_path = os.path.join(model_dir, "model_int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            self._export(model_name, model_dir)
+        if quantize and not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            self.logger.info(f"Quantizing ONNX reranker to int8: {model_name}")
+            tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+            quantize_dynamic(model_input=fp32_path, model_output=tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+        return int8_path if quantize else fp32_path
+
+    def _export(self, model_name: str, model_dir: str) -> None:
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self.logger.info(f"Exporting reranker to ONNX: {model_name}")
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=CACHE_DIR).eval()
+        dummy_inputs = dict(self.tokenizer(["query"], ["passage"], return_tensors="pt"))
+        # torch.onnx.export binds the inputs positionally in forward() order, not in the tokenizer key order.
+        # Parameters the tokenizer does not produce are passed as None up to the last one it does.
+        parameters = list(inspect.signature(model.forward).parameters)
+        input_names = [name for name in parameters if name in dummy_inputs]
+        args = tuple(dummy_inputs.get(name) for name in parameters[:parameters.index(input_names[-1]) + 1])
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+
+        # Export next to the target and rename, so concurrent worker processes never load a partial model
+        tmp_dir = f"{model_dir}.{os.getpid()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        with torch.no_grad():
+            torch.onnx.export(model, args, os.path.join(tmp_dir, "model.onnx"),
+                              input_names=input_names, output_names=["logits"],
+                              dynamic_axes=dynamic_axes, opset_version=14)
+        try:
+            os.makedirs(os.path.dirname(model_dir), exist_ok=True)
+            os.rename(tmp_dir, model_dir)
+        except OSError:
+            # Another process finished the export first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def compute_score(self, sentence_pairs: Union[List[List[str]], List[str]], batch_size: int = 32,
+                      max_length: Optional[int] = None, normalize: bool = False) -> Union[float, List[float]]:
+        """
+        Score (query, passage) pairs.
+
+        Args:
+            sentence_pairs (Union[List[List[str]], List[str]]): Pairs to score, or a single pair
+            batch_size (int): Pairs per ONNX Runtime call
+            max_length (Optional[int]): Token limit of a pair, defaults to the limit given at load time
+            normalize (bool): Map the logits to [0, 1] with a sigmoid, as FlagReranker does
+
+        Returns:
+            Union[float, List[float]]: A bare float for a single pair, one score per pair otherwise
+        """
+        if isinstance(sentence_pairs[0], str):
+            sentence_pairs = [sentence_pairs]
+
+        scores = []
+        for start in range(0, len(sentence_pairs), batch_size):
+            batch = sentence_pairs[start:start + batch_size]
+            inputs = self.tokenizer([pair[0] for pair in batch], [pair[1] for pair in batch],
+                                    padding=True, truncation=True, max_length=max_length or self.max_length,
+                                    return_tensors="np")
+            logits = self.session.run(None, {name: inputs[name].astype(np.int64) for name in self.input_names})[0]
+            scores.append(logits[:, 0])
+
+        scores = np.concatenate(scores).astype(float)
+        if normalize:
+            scores = 1 / (1 + np.exp(-scores))
+        return float(scores[0]) if len(scores) == 1 else scores.tolist()
+
 
 class ModelLoader(LoggerMixin):
     """
     Singleton class to load and cache models across the application.
-    This ensures models are loaded only once and reused throughout the app.
+    Models are loaded on first use (or during warmup) through the memory-budgeted model registry,
+    so each one is loaded only once and reused throughout the app. Only models listed in
+    model_config.yaml can be loaded.
+
+    The `use_*` variants hold the model for the duration of a `with` block, so it is never
+    evicted while an inference call is running on it.
     """
     
     @staticmethod
-    @lru_cache(maxsize=5)
-    def get_flag_reranker(model_key: Optional[str] = None) -> FlagReranker:
+    def get_flag_reranker(model_key: Optional[str] = None,
+                          backend: Optional[str] = None) -> Union["FlagReranker", OnnxReranker]:
         """
-        Load and cache a FlagReranker model.
+        Load and cache a cross-encoder reranker.
         
         Args:
-            model_key (Optional[str]): Key of model in config or direct model name
+            model_key (Optional[str]): Key of model in config or model name listed in config
+            backend (Optional[str]): 'torch', 'onnx' or 'onnx-int8', defaults to the RERANKING_BACKEND
+                                     entry of the model key in config, then to 'torch'
             
         Returns:
-            FlagReranker: Loaded model
+            Union[FlagReranker, OnnxReranker]: Loaded model, both expose `compute_score`
         """
-        logger = ModelLoader().logger
-        
+        return model_registry.get(*ModelLoader._flag_reranker_spec(model_key, backend))
+
+    @staticmethod
+    def use_flag_reranker(model_key: Optional[str] = None,
+                          backend: Optional[str] = None) -> ContextManager[Union["FlagReranker", OnnxReranker]]:
+        return model_registry.acquire(*ModelLoader._flag_reranker_spec(model_key, backend))
+
+    @staticmethod
+    def _flag_reranker_spec(model_key: Optional[str], backend: Optional[str]) -> Tuple[str, Callable[[], Any]]:
         # Determine model name based on key or default
         model_name = ModelLoader._resolve_model_name(model_key, "BAAI_COLLECTION_RERANK")
-        
-        logger.info(f"Loading FlagReranker model: {model_name}")
-        return FlagReranker(model_name, use_fp16=True)
+        backend = backend or rerank_backend_config.get(model_key or "BAAI_COLLECTION_RERANK", "torch")
+        if backend not in RERANK_BACKENDS:
+            raise ValueError(f"Unsupported reranker backend {backend}, expected one of {RERANK_BACKENDS}")
+
+        def load():
+            ModelLoader().logger.info(f"Loading reranker model: {model_name} (backend={backend})")
+            if backend == "torch":
+                import torch
+                from FlagEmbedding import FlagReranker
+                # fp16 only pays off on GPU, on CPU it is slower than fp32
+                return FlagReranker(model_name, use_fp16=torch.cuda.is_available())
+            return OnnxReranker(model_name, quantize=backend == "onnx-int8")
+
+        return f"reranker:{model_name}:{backend}", load
     
     @staticmethod
-    @lru_cache(maxsize=5)
-    def get_sentence_transformer(model_key: Optional[str] = None) -> SentenceTransformer:
+    def get_sentence_transformer(model_key: Optional[str] = None) -> "SentenceTransformer":
         """
         Load and cache a SentenceTransformer model.
         
         Args:
-            model_key (Optional[str]): Key of model in config or direct model name
+            model_key (Optional[str]): Key of model in config or model name listed in config
             
         Returns:
             SentenceTransformer: Loaded model
         """
-        logger = ModelLoader().logger
-        
+        return model_registry.get(*ModelLoader._sentence_transformer_spec(model_key))
+
+    @staticmethod
+    def use_sentence_transformer(model_key: Optional[str] = None) -> ContextManager["SentenceTransformer"]:
+        return model_registry.acquire(*ModelLoader._sentence_transformer_spec(model_key))
+
+    @staticmethod
+    def _sentence_transformer_spec(model_key: Optional[str]) -> Tuple[str, Callable[[], Any]]:
         # Determine model name based on key or default
         model_name = ModelLoader._resolve_model_name(model_key, "CROSS_ENCODER_MS_MARCO_RERANK")
-        
-        logger.info(f"Loading SentenceTransformer model: {model_name}")
-        return SentenceTransformer(model_name, cache_folder=CACHE_DIR)
+
+        def load():
+            from sentence_transformers import SentenceTransformer
+            ModelLoader().logger.info(f"Loading SentenceTransformer model: {model_name}")
+            return SentenceTransformer(model_name, cache_folder=CACHE_DIR)
+
+        return f"sentence_transformer:{model_name}", load
     
     @staticmethod
-    @lru_cache(maxsize=5)
     def get_tokenizer(model_name: str = "BAAI/bge-small-en-v1.5") -> AutoTokenizer:
         """
         Load and cache a tokenizer.
         
         Args:
-            model_name (str): Name of the tokenizer model
+            model_name (str): Name of the tokenizer model, must be listed in config
             
         Returns:
             AutoTokenizer: Loaded tokenizer
         """
-        logger = ModelLoader().logger
-        logger.info(f"Loading tokenizer: {model_name}")
-        return AutoTokenizer.from_pretrained(model_name, cache_dir=CACHE_DIR)
+        if model_name not in ALLOWED_MODEL_NAMES:
+            raise ValueError(f"Model {model_name} is not listed in {settings.MODEL_CONFIG_FILENAME}")
+
+        def load():
+            ModelLoader().logger.info(f"Loading tokenizer: {model_name}")
+            return AutoTokenizer.from_pretrained(model_name, cache_dir=CACHE_DIR)
+
+        return model_registry.get(f"tokenizer:{model_name}", load)
     
     @staticmethod
     def _resolve_model_name(model_key: Optional[str], default_key: str) -> str:
@@ -83,11 +240,14 @@ class ModelLoader(LoggerMixin):
         Resolve model name from config based on key or use default.
         
         Args:
-            model_key (Optional[str]): Key in config or direct model name
+            model_key (Optional[str]): Key in config or model name listed in config
             default_key (str): Default key to use if model_key is None
             
         Returns:
             str: Resolved model name
+
+        Raises:
+            ValueError: If model_key is neither a key nor a model name of model_config.yaml
         """
         if model_key is None:
             # Use default key if available
@@ -100,11 +260,13 @@ class ModelLoader(LoggerMixin):
         elif model_key in rerank_config:
             # Get model name from config using provided key
             return rerank_config[model_key]
-        else:
-            # Use key directly as model name if not found in config
+        elif model_key in ALLOWED_MODEL_NAMES:
+            # Model names listed in config can be used directly
             return model_key
+        else:
+            # Arbitrary Hugging Face names would let callers pin any model in memory
+            raise ValueError(f"Model {model_key} is not listed in {settings.MODEL_CONFIG_FILENAME}")
 
-# Create singleton instances for direct import
-flag_reranker = ModelLoader.get_flag_reranker()
-sentence_transformer = ModelLoader.get_sentence_transformer()
-default_tokenizer = ModelLoader.get_tokenizer()
\ No newline at end of file
+# Default models, loaded by `model_registry.warmup()` at startup instead of at import time
+model_registry.register_warmup("default_reranker", ModelLoader.get_flag_reranker)
+model_registry.register_warmup("default_sentence_transformer", ModelLoader.get_sentence_transformer)
\ No newline at end of file
@@ -0,0 +1,207 @@
+import gc
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+import psutil
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+
+
+def current_rss_mb() -> float:
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def process_memory_mb(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    Resident, proportional and unique memory of a process. USS is the memory only this process holds,
+    pages shared copy-on-write with a preload master count in RSS and (proportionally) in PSS only.
+    """
+    memory = psutil.Process(pid).memory_full_info()
+    return {
+        'rss_mb': round(memory.rss / (1024 * 1024), 1),
+        'pss_mb': round(getattr(memory, 'pss', 0) / (1024 * 1024), 1),
+        'uss_mb': round(memory.uss / (1024 * 1024), 1),
+    }
+
+
+def ort_intra_op_threads() -> Optional[int]:
+    """
+    Intra-op threads of the ONNX Runtime sessions (ONNX rerankers and fastembed models).
+    ONNX Runtime thread pools do not survive fork(), so sessions created by a preload master run single-threaded
+    and the forked workers provide the parallelism.
+    """
+    if settings.SERVING_MODE == 'preload':
+        return 1
+    return settings.INFERENCE_INTRA_OP_THREADS or None
+
+
+def estimate_model_size_mb(model: Any, rss_delta_mb: float) -> float:
+    """
+    Memory held by a model: its parameter bytes for torch models (FlagReranker wraps one in `.model`),
+    otherwise the resident memory the process gained while loading it.
+    """
+    module = model if hasattr(model, 'parameters') else getattr(model, 'model', None)
+    if module is not None and hasattr(module, 'parameters'):
+        try:
+            parameter_bytes = sum(parameter.numel() * parameter.element_size() for parameter in module.parameters())
+            return max(parameter_bytes / (1024 * 1024), rss_delta_mb)
+        except Exception:
+            pass
+    return max(rss_delta_mb, 0.0)
+
+
+class ModelRegistry(LoggerMixin):
+    """
+    Process-wide registry of loaded models with a RAM budget.
+
+    Nothing is loaded at import time: a model is built by its loader on the first `get`, or ahead of
+    traffic through `warmup`. Concurrent first calls for the same key load the model only once.
+    Load time and memory are recorded per model.
+
+    When the models together exceed `budget_mb`, the least recently used ones are evicted. Models used
+    through `acquire` are reference counted and never evicted while a caller still holds them.
+    """
+
+    def __init__(self, budget_mb: float = settings.MODEL_CACHE_BUDGET_MB):
+        super().__init__()
+        self.budget_mb = budget_mb
+        self.evictions = 0
+        self._models: OrderedDict = OrderedDict()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._refs: Dict[str, int] = {}
+        self._warmups: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get the model registered under `key`, loading it with `loader` on first use.
+        The model is not pinned, prefer `acquire` around inference calls.
+
+        Args:
+            key (str): Unique model key, e.g. 'reranker:BAAI/bge-reranker-v2-m3:onnx'
+            loader (Callable[[], Any]): Builds the model
+
+        Returns:
+            Any: The loaded model
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+            model = self._load(key, loader)
+        self._evict(keep=key)
+        return model
+
+    @contextmanager
+    def acquire(self, key: str, loader: Callable[[], Any]) -> Iterator[Any]:
+        """
+        Use a model for the duration of the `with` block, it cannot be evicted meanwhile.
+        """
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+        try:
+            yield self.get(key, loader)
+        finally:
+            with self._lock:
+                self._refs[key] -= 1
+                if not self._refs[key]:
+                    del self._refs[key]
+
+    def _load(self, key: str, loader: Callable[[], Any]) -> Any:
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        model = loader()
+        load_seconds = time.perf_counter() - start
+        rss_delta = current_rss_mb() - rss_before
+        size_mb = estimate_model_size_mb(model, rss_delta)
+
+        with self._lock:
+            self._models[key] = model
+            self._stats[key] = {
+                'load_seconds': round(load_seconds, 3),
+                'rss_delta_mb': round(rss_delta, 1),
+                'size_mb': round(size_mb, 1),
+            }
+        self.logger.info(f'event=model-loaded model="{key}" load_seconds={load_seconds:.2f} '
+                         f'rss_delta_mb={rss_delta:.1f} size_mb={size_mb:.1f}')
+        return model
+
+    def _used_mb(self) -> float:
+        return sum(self._stats[key]['size_mb'] for key in self._models)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        if self.budget_mb <= 0:
+            return
+        evicted = []
+        with self._lock:
+            # Oldest first, skipping the model just loaded and the models in use
+            for key in list(self._models):
+                if self._used_mb() <= self.budget_mb:
+                    break
+                if key == keep or self._refs.get(key):
+                    continue
+                del self._models[key]
+                self._stats.pop(key, None)
+                self.evictions += 1
+                evicted.append(key)
+            over_budget = self._used_mb() > self.budget_mb
+
+        if evicted:
+            # Weights are freed once no inference call references them any more
+            gc.collect()
+            self.logger.info(f'event=model-evicted models={evicted} budget_mb={self.budget_mb}')
+        if over_budget:
+            self.logger.warning(f'event=model-budget-exceeded used_mb={self._used_mb():.1f} budget_mb={self.budget_mb} '
+                                f'message="Models in use cannot be evicted."')
+
+    def register_warmup(self, name: str, load: Callable[[], Any]) -> None:
+        """
+        Register a model to load during `warmup`. `load` must go through `get` (e.g. a ModelLoader getter).
+        """
+        self._warmups[name] = load
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the registered warmup models, all of them when `names` is None.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per-model load stats, see `stats`
+        """
+        start = time.perf_counter()
+        for name in (names if names is not None else list(self._warmups)):
+            try:
+                self._warmups[name]()
+            except Exception as e:
+                self.logger.error(f'event=model-warmup model="{name}" message="Warmup failed." error="{str(e)}"')
+        self.logger.info(f'event=model-warmup-done seconds={time.perf_counter() - start:.2f} '
+                         f'rss_mb={current_rss_mb():.1f}')
+        return self.stats()['models']
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._models
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'rss_mb': round(current_rss_mb(), 1),
+                'budget_mb': self.budget_mb,
+                'used_mb': round(self._used_mb(), 1),
+                'evictions': self.evictions,
+                'models': {key: {**self._stats[key], 'refs': self._refs.get(key, 0)} for key in self._models},
+            }
+
+
+# Create a singleton instance shared by ModelLoader and the embedding model getters
+model_registry = ModelRegistry()
@@ -0,0 +1,145 @@
+import gc
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+from src.helpers.model_registry_helper import model_registry, process_memory_mb
+
+
+class PreloadServer(LoggerMixin):
+    """
+    Preload-and-fork serving mode.
+
+    The master process loads every warmup model once, freezes the garbage collector so the loaded objects
+    are not touched (and copied) by later collections, binds the listening socket and forks the workers.
+    Each worker runs its own uvicorn.Server on the inherited socket and shares the model weights and
+    ONNX Runtime sessions of the master copy-on-write.
+
+    Nothing runs inference in the master: torch and ONNX Runtime thread pools started before fork() are
+    unusable in the children. ONNX Runtime sessions run single-threaded in this mode, see `ort_intra_op_threads`.
+    """
+
+    def __init__(self, app: Any, host: str = settings.HOST, port: int = settings.PORT,
+                 workers: int = settings.UVICORN_WORKERS, log_level: str = settings.LOG_LEVEL.lower(),
+                 log_config: Optional[Dict[str, Any]] = None,
+                 memory_report_interval: float = settings.PRELOAD_MEMORY_REPORT_INTERVAL):
+        super().__init__()
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("Preload serving mode needs os.fork(), it is only available on POSIX systems")
+        if settings.INFERENCE_EXECUTOR_MODE != 'thread':
+            raise ValueError("Preload serving mode shares the master's models, it requires INFERENCE_EXECUTOR_MODE=thread")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.log_level = log_level
+        self.log_config = log_config
+        self.memory_report_interval = memory_report_interval
+        self._worker_pids: List[int] = []
+        self._should_exit = False
+
+    def run(self) -> None:
+        model_registry.warmup()
+
+        sock = self._bind_socket()
+        # Move everything allocated so far to the permanent generation, collections in the workers then
+        # never write to these objects and their pages stay shared
+        gc.collect()
+        gc.freeze()
+
+        for _ in range(self.workers):
+            self._spawn_worker(sock)
+        self.logger.info(f'event=preload-master-started pid={os.getpid()} workers={self._worker_pids} '
+                         f'address={self.host}:{self.port}')
+
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+        self._supervise(sock)
+
+    def _bind_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn_worker(self, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid == 0:
+            # Worker: restore default signal handling, uvicorn installs its own handlers
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                config = uvicorn.Config(self.app, log_level=self.log_level, log_config=self.log_config)
+                uvicorn.Server(config).run(sockets=[sock])
+            except Exception as e:
+                self.logger.error(f'event=preload-worker-failed pid={os.getpid()} error="{str(e)}"')
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self._worker_pids.append(pid)
+
+    def _supervise(self, sock: socket.socket) -> None:
+        # Give the workers time to start before the first memory report
+        next_report = time.monotonic() + 10
+        reported = False
+        while not self._should_exit:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self._worker_pids.remove(pid)
+                if not self._should_exit:
+                    self.logger.error(f'event=preload-worker-exited pid={pid} status={status} message="Restarting worker."')
+                    self._spawn_worker(sock)
+                continue
+
+            if time.monotonic() >= next_report and (not reported or self.memory_report_interval > 0):
+                self.log_memory_report()
+                reported = True
+                next_report = time.monotonic() + self.memory_report_interval
+            time.sleep(0.5)
+
+        for pid in self._worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self._worker_pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sock.close()
+        self.logger.info('event=preload-master-stopped')
+
+    def _handle_exit(self, signum, frame) -> None:
+        self._should_exit = True
+
+    def memory_report(self) -> Dict[str, Any]:
+        """
+        Memory of the master and of each worker. A worker's USS is what it does not share with the master,
+        i.e. the memory each additional worker really costs.
+        """
+        workers = {}
+        for pid in self._worker_pids:
+            try:
+                workers[pid] = process_memory_mb(pid)
+            except Exception as e:
+                workers[pid] = {'error': str(e)}
+        return {'master': process_memory_mb(), 'workers': workers}
+
+    def log_memory_report(self) -> None:
+        report = self.memory_report()
+        self.logger.info(f'event=preload-memory-report master={report["master"]}')
+        for pid, memory in report['workers'].items():
+            self.logger.info(f'event=preload-memory-report worker={pid} memory={memory}')
@@ -1,115 +1,323 @@
+import os
 import uuid
-from qdrant_client import models, QdrantClient
-from typing import Literal, List, Dict, Any, Optional
+import asyncio
+import functools
+import threading
+import httpx
+from qdrant_client import models, QdrantClient, AsyncQdrantClient
+from typing import Literal, List, Dict, Any, Optional, Tuple
 from langchain_core.documents import Document
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from fastembed.text import TextEmbedding
 from fastembed.sparse import SparseTextEmbedding
 from fastembed.late_interaction import LateInteractionTextEmbedding
 
 from src.utils.config import settings
+from src.utils.constants import ExpansionMode
+from src.schemas.search import SearchProfile, get_search_profile
 from src.utils.logger.custom_logging import LoggerMixin
-from src.helpers.text_preprocess_helper import embedding_function, text_embedding_model, late_interaction_text_embedding_model, bm25_embedding_model
+from src.helpers.inference_backend_helper import inference_backend
+from src.helpers.collection_registry_helper import CollectionRegistry, collection_registry, MISSING
+from src.helpers.cache_helper import QueryEmbeddingCache, query_embedding_cache
 
 
 TEXT_EMBEDDING_MODEL="sentence-transformers/all-MiniLM-L6-v2"
 LATE_INTERACTION_TEXT_EMBEDDING_MODEL="colbert-ir/colbertv2.0"
 BM25_EMBEDDING_MODEL="Qdrant/bm25"
+# One payload-only "parent" point per (document, headers) section is stored in the collection itself, marked with
+# doc_level=section. It has no vectors, so searches never return it, and deletes by document remove it with the chunks.
+DOC_LEVEL_SECTION="section"
+# Payload fields used by retrieval filters, section expansion and deletes
+PAYLOAD_INDEXES={
+    "doc_level": "keyword",
+    "metadata.index": "integer",
+    "metadata.document_name": "keyword",
+    "metadata.headers": "keyword",
+    "metadata.document_id": "keyword",
+    "metadata.extension": "keyword",
+}
+
+# Qdrant clients of the current process, shared by every QdrantConnection, see `get_qdrant_clients`
+_qdrant_clients: Dict[int, Tuple[QdrantClient, AsyncQdrantClient]] = {}
+_qdrant_clients_lock = threading.Lock()
+
+
+def get_qdrant_clients() -> Tuple[QdrantClient, AsyncQdrantClient]:
+    """
+    Sync and async Qdrant clients of this process, created on first use.
+    Keyed by pid so workers forked by a preload master never reuse the master's connections.
+    """
+    pid = os.getpid()
+    with _qdrant_clients_lock:
+        if pid not in _qdrant_clients:
+            _qdrant_clients[pid] = (QdrantClient(**QdrantConnection._get_client_config()),
+                                    AsyncQdrantClient(**QdrantConnection._get_client_config()))
+        return _qdrant_clients[pid]
+
+
+async def close_qdrant_clients() -> None:
+    """
+    Close the Qdrant clients of this process, called when the app shuts down.
+    """
+    with _qdrant_clients_lock:
+        clients = _qdrant_clients.pop(os.getpid(), None)
+    if clients is not None:
+        client, async_client = clients
+        await async_client.close()
+        client.close()
+
 
 class QdrantConnection(LoggerMixin):
-    def __init__(self, embedding_func: HuggingFaceEmbeddings | None = embedding_function):
+    def __init__(self):
         super().__init__()
-        self.client = QdrantClient(url=settings.QDRANT_ENDPOINT, timeout=600)
-        self.embedding_function = embedding_func #To be removed 
+        # Embedding models are resolved lazily by the inference tasks
+        self.embedding_cache: QueryEmbeddingCache = query_embedding_cache
+        self.registry: CollectionRegistry = collection_registry
 
-        self.text_embedding_model = text_embedding_model
-        self.late_interaction_text_embedding_model = late_interaction_text_embedding_model
-        self.bm25_embedding_model = bm25_embedding_model
+    @property
+    def client(self) -> QdrantClient:
+        # Sync client is kept for the synchronous collection management handlers
+        return get_qdrant_clients()[0]
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        # Every coroutine below goes through the async client so it never blocks the event loop.
+        # Connections are pooled per process, building a QdrantConnection per request opens none.
+        return get_qdrant_clients()[1]
+
+    @staticmethod
+    def _get_client_config() -> Dict[str, Any]:
+        max_message_length = settings.QDRANT_GRPC_MAX_MESSAGE_MB * 1024 * 1024
+        return {
+            "url": settings.QDRANT_ENDPOINT,
+            "timeout": settings.QDRANT_TIMEOUT,
+            "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+            "grpc_port": settings.QDRANT_GRPC_PORT,
+            "grpc_options": {
+                "grpc.max_send_message_length": max_message_length,
+                "grpc.max_receive_message_length": max_message_length,
+                "grpc.keepalive_time_ms": 30000,
+            },
+            # Reuse REST connections instead of opening one per request
+            "limits": httpx.Limits(max_connections=settings.QDRANT_POOL_SIZE,
+                                   max_keepalive_connections=settings.QDRANT_POOL_SIZE),
+        }
 
     async def add_data(
         self, 
         documents: List[Document], 
         collection_name: str = settings.QDRANT_COLLECTION_NAME
     ) -> bool:
-        if not self.client.collection_exists(collection_name=collection_name):
+        # Write path: another worker may have deleted the collection since it was cached
+        if not await self.acollection_exists(collection_name=collection_name, use_cache=False):
             self.logger.info(f"CREATING NEW COLLECTION {collection_name}")
-            is_created = self._create_collection(collection_name=collection_name)
+            is_created = await self._acreate_collection(collection_name=collection_name)
             if is_created:
                 self.logger.info(f"CREATING NEW COLLECTION {collection_name} SUCCESS.")
+        else:
+            await self.aensure_collection_layout(collection_name)
 
-        self._upload_documents(collection_name=collection_name, documents=documents, batch_size=16)
-
-        self.logger.info(f"CREATING PAYLOAD INDEX {collection_name}")
-        self.client.create_payload_index(
-            collection_name=collection_name,
-            field_name="metadata.index",
-            field_schema="integer",
-        )
+        await self._upload_documents(collection_name=collection_name, documents=documents, batch_size=16)
+        self.registry.invalidate(collection_name)
         return True
 
     async def hybrid_search(
         self, 
         query: str = None,
         collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        search_profile: Optional[SearchProfile] = None,
+        query_filter: Optional[models.Filter] = None,
     ) -> Optional[List[Document]]:
-        if not self.client.collection_exists(collection_name=collection_name):
+        search_profile = search_profile or get_search_profile()
+        if not await self.acollection_exists(collection_name=collection_name):
             raise Exception(f"Collection {collection_name} does not exist")
+        await self.aensure_collection_layout(collection_name)
 
-        dense_query_vector = next(self.text_embedding_model.query_embed(query))
-        sparse_query_vector = next(self.bm25_embedding_model.query_embed(query))
-        late_query_vector = next(self.late_interaction_text_embedding_model.query_embed(query))
+        # The three query encoders run in parallel in the inference pool, latency is the slowest of them
+        dense_query_vectors, sparse_query_vectors, late_query_vectors = await self._embed_queries([query])
+        dense_query_vector, sparse_query_vector, late_query_vector = (
+            dense_query_vectors[0], sparse_query_vectors[0], late_query_vectors[0]
+        )
 
-        prefetch = self._create_prefetch(dense_query_vector, sparse_query_vector)
+        prefetch = self._create_prefetch(dense_query_vector, sparse_query_vector, query_filter=query_filter,
+                                         search_profile=search_profile)
 
-        results = self.client.query_points(
+        results = await self.async_client.query_points(
             collection_name,
             prefetch=prefetch,
             query=late_query_vector,
             using=LATE_INTERACTION_TEXT_EMBEDDING_MODEL,
+            search_params=self._create_search_params(search_profile),
             with_payload=True,
-            limit=20,
+            limit=search_profile.limit,
         )
         return [self._point_to_document(point) for point in results.points]
     
 
+    async def hybrid_search_batch(
+        self, 
+        queries: List[str],
+        collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        search_profile: Optional[SearchProfile] = None,
+        query_filter: Optional[models.Filter] = None,
+    ) -> List[List[Document]]:
+        search_profile = search_profile or get_search_profile()
+        if not await self.acollection_exists(collection_name=collection_name):
+            raise Exception(f"Collection {collection_name} does not exist")
+        await self.aensure_collection_layout(collection_name)
+
+        # One batched fastembed call per model for every query missing from the cache
+        dense_query_vectors, sparse_query_vectors, late_query_vectors = await self._embed_queries(queries)
+
+        requests = [
+            models.QueryRequest(
+                prefetch=self._create_prefetch(dense_query_vector, sparse_query_vector, query_filter=query_filter,
+                                               search_profile=search_profile),
+                query=late_query_vector,
+                using=LATE_INTERACTION_TEXT_EMBEDDING_MODEL,
+                params=self._create_search_params(search_profile),
+                with_payload=True,
+                limit=search_profile.limit,
+            )
+            for dense_query_vector, sparse_query_vector, late_query_vector
+            in zip(dense_query_vectors, sparse_query_vectors, late_query_vectors)
+        ]
+        responses = await self.async_client.query_batch_points(collection_name, requests=requests)
+        return [[self._point_to_document(point) for point in response.points] for response in responses]
+
+    async def _embed_queries(self, queries: List[str]) -> Tuple[List[Any], List[Any], List[Any]]:
+        """
+        Dense, BM25 and ColBERT vectors of `queries`, served from the cache or computed concurrently by the inference backend.
+        """
+        return await asyncio.gather(*[
+            self.embedding_cache.get_or_compute_batch(
+                model_name, queries, functools.partial(inference_backend.query_embed, model_kind)
+            )
+            for model_name, model_kind in (
+                (TEXT_EMBEDDING_MODEL, 'dense'),
+                (BM25_EMBEDDING_MODEL, 'sparse'),
+                (LATE_INTERACTION_TEXT_EMBEDDING_MODEL, 'late_interaction'),
+            )
+        ])
+
+    async def embed_dense(self, texts: List[str], is_query: bool = False) -> List[Any]:
+        """
+        TEXT_EMBEDDING_MODEL vectors of `texts`, the vector space of the stored dense vectors.
+        Query vectors are served from the query embedding cache.
+        """
+        if is_query:
+            return await self.embedding_cache.get_or_compute_batch(
+                TEXT_EMBEDDING_MODEL, texts, functools.partial(inference_backend.query_embed, 'dense')
+            )
+        return await inference_backend.passage_embed('dense', texts)
+
+    async def retrieve_dense_vectors(
+        self,
+        point_ids: List[str],
+        collection_name: str = settings.QDRANT_COLLECTION_NAME
+    ) -> Dict[str, Tuple[List[float], str]]:
+        """
+        Fetch the stored TEXT_EMBEDDING_MODEL vectors and contents of points with one retrieve call.
+
+        Args:
+            point_ids (List[str]): Point ids, ids that are not valid Qdrant ids are skipped
+            collection_name (str): Name of the collection
+
+        Returns:
+            Dict[str, Tuple[List[float], str]]: (vector, page_content) by requested id, unknown ids are absent
+        """
+        requested_ids = {}
+        normalized_ids = []
+        for point_id in point_ids:
+            normalized_id = self._normalize_point_id(point_id)
+            if normalized_id is not None and str(normalized_id) not in requested_ids:
+                requested_ids[str(normalized_id)] = point_id
+                normalized_ids.append(normalized_id)
+        if not normalized_ids:
+            return {}
+
+        points = await self.async_client.retrieve(
+            collection_name,
+            ids=normalized_ids,
+            with_payload=['page_content'],
+            with_vectors=[TEXT_EMBEDDING_MODEL],
+        )
+        return {
+            requested_ids[str(point.id)]: (point.vector[TEXT_EMBEDDING_MODEL], point.payload.get('page_content'))
+            for point in points
+            # Parent section points carry no vectors
+            if str(point.id) in requested_ids and point.vector and TEXT_EMBEDDING_MODEL in point.vector
+        }
+
+    @staticmethod
+    def _normalize_point_id(point_id: str) -> Optional[int | str]:
+        # Qdrant only accepts UUIDs and unsigned integers, and reports UUIDs in canonical form
+        if point_id.isdigit():
+            return int(point_id)
+        try:
+            return str(uuid.UUID(point_id))
+        except ValueError:
+            return None
+
     async def query_headers(
         self, 
         documents: List[Document], 
-        collection_name: str = settings.QDRANT_COLLECTION_NAME
+        collection_name: str = settings.QDRANT_COLLECTION_NAME,
+        expansion_mode: str = settings.QDRANT_EXPANSION_MODE,
+        window: int = settings.QDRANT_EXPANSION_WINDOW,
+        max_chars: int = settings.QDRANT_EXPANSION_MAX_CHARS,
     ) -> Optional[List[Document]]:
+        if expansion_mode not in ExpansionMode.list():
+            raise ValueError(f"Unsupported expansion mode {expansion_mode}, expected one of {ExpansionMode.list()}")
+
         processed_documents = {}
-        # get max point data in qdrant collection 
-        info_collection = self.client.get_collection(collection_name=collection_name)
-        vectors_count = int(info_collection.points_count)
+        # Group the hits by section first, so every section is expanded once
         for doc in documents:
             if doc.metadata['headers'] in processed_documents:
                 processed_documents[doc.metadata['headers']]['score'] += 1
+                processed_documents[doc.metadata['headers']]['indices'].append(doc.metadata['index'])
+                if 'rerank_score' in doc.metadata:
+                    section_metadata = processed_documents[doc.metadata['headers']]['metadata']
+                    section_metadata['rerank_score'] = max(section_metadata.get('rerank_score', 0.0), doc.metadata['rerank_score'])
                 continue
 
-            query_filter = self._create_headers_filter(doc.metadata)
-            results = self.client.query_points(
-                collection_name,
-                prefetch=[
-                    models.Prefetch(
-                        filter=query_filter,
-                        limit=vectors_count,
-                    ),
-                ],
-                query=models.OrderByQuery(order_by="metadata.index"),
-                limit=vectors_count,
-            )
-            
-            page_content = ''.join([point.payload['page_content'] for point in results.points])
-            metadata = {
-                'document_name': doc.metadata['document_name'],
-                'headers': doc.metadata['headers'],
-                'document_id': doc.metadata['document_id'],
-            }
-
             processed_documents[doc.metadata['headers']] = {
-                'document': Document(page_content=page_content, metadata=metadata),
+                'metadata': {
+                    'document_name': doc.metadata['document_name'],
+                    'headers': doc.metadata['headers'],
+                    'document_id': doc.metadata['document_id'],
+                },
+                'indices': [doc.metadata['index']],
                 'score': 1
             }
+            # Keep the best reranker score of the section so callers can cut off without rescoring
+            if 'rerank_score' in doc.metadata:
+                processed_documents[doc.metadata['headers']]['metadata']['rerank_score'] = doc.metadata['rerank_score']
+
+        if not processed_documents:
+            return []
+
+        if expansion_mode == ExpansionMode.Parent.value:
+            # Resolve each section with a single point lookup by its deterministic id
+            await self._resolve_parent_sections(list(processed_documents.values()), collection_name, max_chars)
+        unresolved_sections = [section for section in processed_documents.values() if 'document' not in section]
+
+        if expansion_mode == ExpansionMode.Window.value and unresolved_sections:
+            # Only +/- window chunks around each hit, so the fetch size is bounded by the number of hits
+            requests = [
+                self._create_expansion_request(
+                    query_filter=self._create_window_filter(section['metadata'], section['indices'], window),
+                    limit=len(section['indices']) * (2 * window + 1),
+                )
+                for section in unresolved_sections
+            ]
+            # Expand all sections in a single round trip instead of one query per section
+            responses = await self.async_client.query_batch_points(collection_name, requests=requests)
+            for section, response in zip(unresolved_sections, responses):
+                page_content = ''.join([point.payload['page_content'] for point in response.points])
+                section['document'] = Document(page_content=page_content[:max_chars], metadata=section['metadata'])
+        elif unresolved_sections:
+            # Sections ingested before parent records existed fall back to the whole-section fetch
+            await self._expand_whole_sections(unresolved_sections, collection_name, max_chars)
 
         # Sort the documents based on the 'score' in descending order
         documents_with_scores = processed_documents.items()
@@ -117,18 +325,234 @@ class QdrantConnection(LoggerMixin):
         sorted_documents_list = [item[1]['document'] for item in sorted_documents]
         return sorted_documents_list 
     
+    async def _expand_whole_sections(
+        self,
+        sections: List[Dict[str, Any]],
+        collection_name: str,
+        max_chars: int,
+        page_size: int = settings.QDRANT_EXPANSION_PAGE_SIZE,
+    ) -> None:
+        """
+        Join every chunk of each section in index order. Sections are fetched page by page, all of them in one
+        query_batch_points call per page, until each is exhausted or reaches `max_chars`. Most sections fit in
+        the first page, i.e. a single round trip.
+        """
+        contents = [[] for _ in sections]
+        lengths = [0] * len(sections)
+        after_index: List[Optional[int]] = [None] * len(sections)
+        pending = list(range(len(sections)))
+        while pending:
+            requests = [
+                self._create_expansion_request(
+                    query_filter=self._create_headers_filter(sections[position]['metadata'], after_index[position]),
+                    limit=page_size,
+                )
+                for position in pending
+            ]
+            responses = await self.async_client.query_batch_points(collection_name, requests=requests)
+
+            next_pending = []
+            for position, response in zip(pending, responses):
+                for point in response.points:
+                    contents[position].append(point.payload['page_content'])
+                    lengths[position] += len(point.payload['page_content'])
+                if len(response.points) == page_size and lengths[position] < max_chars:
+                    # Next page starts after the last chunk index seen
+                    after_index[position] = response.points[-1].payload['metadata']['index']
+                    next_pending.append(position)
+            pending = next_pending
+
+        for section, chunks in zip(sections, contents):
+            section['document'] = Document(page_content=''.join(chunks)[:max_chars], metadata=section['metadata'])
+
+    def collection_exists(self, collection_name: str, use_cache: bool = True) -> bool:
+        # Only positive answers are cached, a collection created elsewhere must be visible right away.
+        # The cache only gates read-only requests, write paths pass use_cache=False: a collection deleted
+        # by another worker stays cached as existing for up to COLLECTION_REGISTRY_TTL.
+        if use_cache and self.registry.get(collection_name, 'exists') is True:
+            return True
+        exists = self.client.collection_exists(collection_name=collection_name)
+        if exists:
+            self.registry.set(collection_name, 'exists', True)
+        else:
+            self.registry.invalidate(collection_name)
+        return exists
+
+    async def acollection_exists(self, collection_name: str, use_cache: bool = True) -> bool:
+        if use_cache and self.registry.get(collection_name, 'exists') is True:
+            return True
+        exists = await self.async_client.collection_exists(collection_name=collection_name)
+        if exists:
+            self.registry.set(collection_name, 'exists', True)
+        else:
+            self.registry.invalidate(collection_name)
+        return exists
+
+    async def aget_points_count(self, collection_name: str, use_cache: bool = True) -> int:
+        points_count = self.registry.get(collection_name, 'points_count') if use_cache else MISSING
+        if points_count is MISSING:
+            info_collection = await self.async_client.get_collection(collection_name=collection_name)
+            points_count = int(info_collection.points_count)
+            self.registry.set(collection_name, 'exists', True)
+            self.registry.set(collection_name, 'config', info_collection.config)
+            self.registry.set(collection_name, 'points_count', points_count)
+        return points_count
+
+    async def add_section_documents(
+        self,
+        documents: List[Document],
+        collection_name: str = settings.QDRANT_COLLECTION_NAME
+    ) -> bool:
+        # Sections are only ever fetched by id or deleted by filter, they carry no vectors
+        await self.async_client.upsert(
+            collection_name,
+            points=[
+                models.PointStruct(
+                    id=self._section_point_id(doc.metadata['document_id'], doc.metadata['headers']),
+                    vector={},
+                    payload={
+                        "page_content": doc.page_content,
+                        "metadata": doc.metadata,
+                        "doc_level": DOC_LEVEL_SECTION,
+                    }
+                )
+                for doc in documents
+            ],
+        )
+        return True
+
+    async def _resolve_parent_sections(
+        self,
+        sections: List[Dict[str, Any]],
+        collection_name: str,
+        max_chars: int
+    ) -> None:
+        ids = [
+            self._section_point_id(section['metadata']['document_id'], section['metadata']['headers'])
+            for section in sections
+        ]
+        points = await self.async_client.retrieve(collection_name, ids=ids, with_payload=True)
+        contents = {
+            str(point.id): point.payload['page_content']
+            for point in points
+            if point.payload.get('doc_level') == DOC_LEVEL_SECTION
+        }
+        for section_id, section in zip(ids, sections):
+            if section_id in contents:
+                section['document'] = Document(page_content=contents[section_id][:max_chars], metadata=section['metadata'])
+
+    @staticmethod
+    def _section_point_id(document_id: str, headers: str) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document_id}:{headers}"))
+
     def _create_collection(self, collection_name: str) -> bool:
         config = self._get_collection_config(
             text_embedding_model=TEXT_EMBEDDING_MODEL,
             late_interaction_text_embedding_model=LATE_INTERACTION_TEXT_EMBEDDING_MODEL, 
             bm25_embedding_model=BM25_EMBEDDING_MODEL
         )
-        return self.client.create_collection(collection_name=collection_name, **config)  
+        self.registry.invalidate(collection_name)
+        is_created = self.client.create_collection(collection_name=collection_name, **config)  
+        if is_created:
+            self._ensure_payload_indexes(collection_name, existing_indexes=set())
+        return is_created
+
+    async def _acreate_collection(self, collection_name: str) -> bool:
+        config = self._get_collection_config(
+            text_embedding_model=TEXT_EMBEDDING_MODEL,
+            late_interaction_text_embedding_model=LATE_INTERACTION_TEXT_EMBEDDING_MODEL, 
+            bm25_embedding_model=BM25_EMBEDDING_MODEL
+        )
+        self.registry.invalidate(collection_name)
+        is_created = await self.async_client.create_collection(collection_name=collection_name, **config)
+        if is_created:
+            await self._aensure_payload_indexes(collection_name, existing_indexes=set())
+        return is_created
+
+    def _missing_payload_indexes(self, collection_name: str, existing_indexes: set) -> Dict[str, str]:
+        missing = {field_name: field_schema for field_name, field_schema in PAYLOAD_INDEXES.items()
+                   if field_name not in existing_indexes}
+        if missing:
+            self.logger.info(f"CREATING PAYLOAD INDEX {collection_name} fields={list(missing)}")
+        return missing
+
+    def _ensure_payload_indexes(self, collection_name: str, existing_indexes: Optional[set] = None) -> None:
+        """
+        Create the PAYLOAD_INDEXES the collection lacks, `existing_indexes` is read from Qdrant when None.
+        """
+        if existing_indexes is None:
+            existing_indexes = set(self.client.get_collection(collection_name=collection_name).payload_schema or {})
+        for field_name, field_schema in self._missing_payload_indexes(collection_name, existing_indexes).items():
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+
+    async def _aensure_payload_indexes(self, collection_name: str, existing_indexes: Optional[set] = None) -> None:
+        if existing_indexes is None:
+            info_collection = await self.async_client.get_collection(collection_name=collection_name)
+            existing_indexes = set(info_collection.payload_schema or {})
+        for field_name, field_schema in self._missing_payload_indexes(collection_name, existing_indexes).items():
+            await self.async_client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+
+    async def aensure_collection_layout(self, collection_name: str) -> None:
+        """
+        Bring a collection created before the current payload layout up to date: create its missing
+        PAYLOAD_INDEXES and backfill `metadata.extension` on chunks ingested without it.
+        Both steps are idempotent, the outcome is cached in the collection registry so a collection is checked
+        once per COLLECTION_REGISTRY_TTL (and after each ingest), not on every request.
+        """
+        if self.registry.get(collection_name, 'layout_ready') is True:
+            return
+        await self._aensure_payload_indexes(collection_name)
+        backfilled = await self._abackfill_extensions(collection_name)
+        if backfilled:
+            self.logger.info(f"BACKFILLED metadata.extension {collection_name} points={backfilled}")
+        self.registry.set(collection_name, 'layout_ready', True)
+
+    async def _abackfill_extensions(self, collection_name: str, batch_size: int = 256) -> int:
+        # Chunks without metadata.extension get the extension of their document_name, so extension filters stay strict
+        missing_filter = models.Filter(
+            must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="metadata.extension"))],
+            must_not=[self._section_condition()],
+        )
+        updated = 0
+        offset = None
+        while True:
+            points, offset = await self.async_client.scroll(
+                collection_name,
+                scroll_filter=missing_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["metadata.document_name"],
+                with_vectors=False,
+            )
+            ids_by_extension: Dict[str, List[Any]] = {}
+            for point in points:
+                document_name = (point.payload or {}).get('metadata', {}).get('document_name') or ''
+                extension = os.path.splitext(document_name)[1][1:].lower()
+                ids_by_extension.setdefault(extension, []).append(point.id)
+            for extension, point_ids in ids_by_extension.items():
+                await self.async_client.set_payload(
+                    collection_name=collection_name,
+                    payload={"extension": extension},
+                    points=point_ids,
+                    key="metadata",
+                )
+            updated += len(points)
+            if offset is None:
+                return updated
     
     def _delete_collection(self, collection_name: str) -> bool:
+        self.registry.invalidate(collection_name)
         return self.client.delete_collection(collection_name=collection_name)
         
-    def _upload_documents(
+    async def _upload_documents(
         self,
         collection_name: str,
         documents: List[Document],
@@ -139,11 +563,13 @@ class QdrantConnection(LoggerMixin):
             
             # Extract page_content for embedding generation
             texts = [doc.page_content for doc in batch]
-            dense_embeddings = list(self.text_embedding_model.passage_embed(texts))
-            bm25_embeddings = list(self.bm25_embedding_model.passage_embed(texts))
-            late_interaction_embeddings = list(self.late_interaction_text_embedding_model.passage_embed(texts))
+            dense_embeddings, bm25_embeddings, late_interaction_embeddings = await asyncio.gather(
+                inference_backend.passage_embed('dense', texts),
+                inference_backend.passage_embed('sparse', texts),
+                inference_backend.passage_embed('late_interaction', texts),
+            )
             
-            self.client.upload_points(
+            await self.async_client.upload_points(
                 collection_name,
                 points=[
                     models.PointStruct(
@@ -170,30 +596,101 @@ class QdrantConnection(LoggerMixin):
         self, 
         dense_query_vector,
         sparse_query_vector, 
-        query_filter: Optional[models.Filter] = None
+        query_filter: Optional[models.Filter] = None,
+        search_profile: Optional[SearchProfile] = None,
     ) -> List[models.Prefetch]:
+        search_profile = search_profile or get_search_profile()
         return [
             models.Prefetch(
                 query=dense_query_vector,
                 using=TEXT_EMBEDDING_MODEL,
                 filter=query_filter,
-                limit=40,   
+                params=self._create_search_params(search_profile),
+                limit=search_profile.dense_limit,   
             ),
             models.Prefetch(
                 query=models.SparseVector(**sparse_query_vector.as_object()),
                 using=BM25_EMBEDDING_MODEL,
                 filter=query_filter,
-                limit=40,
+                limit=search_profile.sparse_limit,
             ),
         ]
+
+    def _create_search_params(self, search_profile: SearchProfile) -> Optional[models.SearchParams]:
+        quantization = None
+        if search_profile.quantization_rescore is not None or search_profile.quantization_oversampling is not None:
+            quantization = models.QuantizationSearchParams(
+                rescore=search_profile.quantization_rescore,
+                oversampling=search_profile.quantization_oversampling,
+            )
+        if search_profile.hnsw_ef is None and not search_profile.exact and quantization is None:
+            return None
+        return models.SearchParams(
+            hnsw_ef=search_profile.hnsw_ef,
+            exact=search_profile.exact,
+            quantization=quantization,
+        )
     
-    def _create_headers_filter(self, metadata: dict) -> models.Filter:
+    def _create_expansion_request(self, query_filter: models.Filter, limit: int) -> models.QueryRequest:
+        # Filtered at the top level, so the `limit` chunks returned are the first ones in index order
+        return models.QueryRequest(
+            query=models.OrderByQuery(order_by="metadata.index"),
+            filter=query_filter,
+            limit=limit,
+            with_payload=True,
+        )
+
+    def _create_window_filter(self, metadata: dict, indices: List[int], window: int) -> models.Filter:
         return models.Filter(
             must=[
                 models.FieldCondition(key="metadata.document_name", match=models.MatchValue(value=metadata['document_name'])),
                 models.FieldCondition(key="metadata.headers", match=models.MatchValue(value=metadata['headers']))
+            ],
+            must_not=[self._section_condition()],
+            should=[
+                models.FieldCondition(key="metadata.index", range=models.Range(gte=index - window, lte=index + window))
+                for index in indices
             ]
         )
+
+    def create_metadata_filter(
+        self,
+        document_ids: Optional[List[str]] = None,
+        document_names: Optional[List[str]] = None,
+        extensions: Optional[List[str]] = None,
+    ) -> Optional[models.Filter]:
+        conditions = [
+            models.FieldCondition(key=key, match=models.MatchAny(any=values))
+            for key, values in (
+                ("metadata.document_id", document_ids),
+                ("metadata.document_name", document_names),
+            )
+            if values
+        ]
+        if extensions:
+            # Chunks ingested without an extension are backfilled by `aensure_collection_layout` before searching
+            conditions.append(models.FieldCondition(
+                key="metadata.extension",
+                match=models.MatchAny(any=[extension.lower().lstrip('.') for extension in extensions]),
+            ))
+        return models.Filter(must=conditions) if conditions else None
+
+    def _create_headers_filter(self, metadata: dict, after_index: Optional[int] = None) -> models.Filter:
+        must = [
+            models.FieldCondition(key="metadata.document_name", match=models.MatchValue(value=metadata['document_name'])),
+            models.FieldCondition(key="metadata.headers", match=models.MatchValue(value=metadata['headers']))
+        ]
+        if after_index is not None:
+            must.append(models.FieldCondition(key="metadata.index", range=models.Range(gt=after_index)))
+        return models.Filter(
+            must=must,
+            must_not=[self._section_condition()],
+        )
+
+    @staticmethod
+    def _section_condition() -> models.FieldCondition:
+        # Expansion rebuilds sections from their chunks, the parent section point must not be joined in
+        return models.FieldCondition(key="doc_level", match=models.MatchValue(value=DOC_LEVEL_SECTION))
         
     async def delete_document_by_file_name(
             self, 
@@ -201,18 +698,21 @@ class QdrantConnection(LoggerMixin):
             collection_name: str = settings.QDRANT_COLLECTION_NAME
     ):
         try:
-            self.client.delete(
+            points_selector = models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="metadata.document_name",
+                        match=models.MatchValue(value=document_name),
+                    )
+
+                ]
+            )
+            # Also removes the parent section points, their metadata carries the document name and id
+            await self.async_client.delete(
                         collection_name=collection_name,
-                        points_selector=models.Filter(
-                            must=[
-                                models.FieldCondition(
-                                    key="metadata.document_name",
-                                    match=models.MatchValue(value=document_name),
-                                )
-
-                            ]
-                        ),
+                        points_selector=points_selector,
                     )
+            self.registry.invalidate(collection_name)
         except Exception as e:
             self.logger.error('event=delete-document-by-file-name-in-qdrant '
                                 'message="Delete document by file name in Qdrant Failed. '
@@ -228,17 +728,19 @@ class QdrantConnection(LoggerMixin):
                         )
                         for document_id in document_ids
                     ]
-            self.client.delete(
+            points_selector = models.Filter(
+                should=conditions
+            )
+            await self.async_client.delete(
                 collection_name=collection_name,
-                points_selector=models.Filter(
-                    should=conditions
-                ),
+                points_selector=points_selector,
             )       
+            self.registry.invalidate(collection_name)
         except Exception as e:
             self.logger.error('event=delete-document-by-batch-ids-in-qdrant '
                               'message="Delete document by batch ids in Qdrant Failed. '
                               f'error="Got unexpected error." error="{str(e)}"')
-        
+
 
     def _get_embedding_dim(self, model_name: str, model_type: Literal['text', 'sparse_text', 'late_interaction_text']):
         if model_type == 'text':
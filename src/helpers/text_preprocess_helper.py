@@ -1,6 +1,5 @@
 import os
-from functools import lru_cache
-from langchain_community.embeddings.sentence_transformer import SentenceTransformerEmbeddings
+from typing import Any, Callable, Dict, Tuple
 
 from fastembed.text import TextEmbedding
 from fastembed.sparse.bm25 import Bm25
@@ -8,44 +7,42 @@ from fastembed.late_interaction import LateInteractionTextEmbedding
 
 from src.utils.config import settings
 from src.utils.config_loader import ConfigReaderInstance
+from src.helpers.model_registry_helper import model_registry, ort_intra_op_threads
 
 FASTEMBED_CACHE_DIR = os.environ.get('FASTEMBED_CACHE_DIR', '/app/cache')
 model_config = ConfigReaderInstance.yaml.read_config_from_file(settings.MODEL_CONFIG_FILENAME)
-EMBEDDING_MODEL = model_config.get('EMBEDDING_MODEL', {}).get('SENTENCE_TRANSFORMER', {})
 
 TEXT_EMBEDDING_MODEL = model_config.get('EMBEDDING_MODEL', {}).get('TEXT_EMBEDDING_MODEL', {})
 LATE_INTERACTION_TEXT_EMBEDDING_MODEL = model_config.get('EMBEDDING_MODEL', {}).get('LATE_INTERACTION_TEXT_EMBEDDING_MODEL', {})
 BM25_EMBEDDING_MODEL = model_config.get('EMBEDDING_MODEL', {}).get('BM25_EMBEDDING_MODEL', {})
 
-@lru_cache()
-def get_embedding_model():
-    _embedding = SentenceTransformerEmbeddings(model_name=EMBEDDING_MODEL, 
-                                               model_kwargs={'token': settings.HUGGINGFACE_ACCESS_TOKEN})
-    return _embedding
+# (registry key, loader) of each fastembed model, loaded on first use or by `model_registry.warmup()` at startup
+EMBEDDING_MODEL_SPECS: Dict[str, Tuple[str, Callable[[], Any]]] = {
+    'dense': (
+        f"fastembed:{TEXT_EMBEDDING_MODEL}",
+        lambda: TextEmbedding(model_name=TEXT_EMBEDDING_MODEL, cache_dir=FASTEMBED_CACHE_DIR,
+                              threads=ort_intra_op_threads()),
+    ),
+    'sparse': (
+        f"fastembed:{BM25_EMBEDDING_MODEL}",
+        lambda: Bm25(model_name=BM25_EMBEDDING_MODEL, cache_dir=FASTEMBED_CACHE_DIR),
+    ),
+    'late_interaction': (
+        f"fastembed:{LATE_INTERACTION_TEXT_EMBEDDING_MODEL}",
+        lambda: LateInteractionTextEmbedding(model_name=LATE_INTERACTION_TEXT_EMBEDDING_MODEL, cache_dir=FASTEMBED_CACHE_DIR,
+                                             threads=ort_intra_op_threads()),
+    ),
+}
 
-embedding_function = get_embedding_model()
-
-
-@lru_cache()
 def get_text_embedding_model() -> TextEmbedding:
-    _text_embedding = TextEmbedding(model_name=TEXT_EMBEDDING_MODEL, cache_dir=FASTEMBED_CACHE_DIR)
-    return _text_embedding
+    return model_registry.get(*EMBEDDING_MODEL_SPECS['dense'])
 
-@lru_cache()
 def get_late_interaction_text_embedding_model() -> LateInteractionTextEmbedding:
-    _late_interaction_text_embedding = LateInteractionTextEmbedding(model_name=LATE_INTERACTION_TEXT_EMBEDDING_MODEL, cache_dir=FASTEMBED_CACHE_DIR )
-    return _late_interaction_text_embedding
+    return model_registry.get(*EMBEDDING_MODEL_SPECS['late_interaction'])
 
-@lru_cache()
 def get_bm25_embedding_model() -> Bm25:
-    _bm25_embedding = Bm25(model_name=BM25_EMBEDDING_MODEL, cache_dir=FASTEMBED_CACHE_DIR)
-    return _bm25_embedding
-
-text_embedding_model = get_text_embedding_model()
-late_interaction_text_embedding_model = get_late_interaction_text_embedding_model()
-bm25_embedding_model = get_bm25_embedding_model()
-
-
-
-
+    return model_registry.get(*EMBEDDING_MODEL_SPECS['sparse'])
 
+model_registry.register_warmup("text_embedding", get_text_embedding_model)
+model_registry.register_warmup("late_interaction_text_embedding", get_late_interaction_text_embedding_model)
+model_registry.register_warmup("bm25_embedding", get_bm25_embedding_model)
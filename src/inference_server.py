@@ -0,0 +1,173 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from src.utils.config import settings
+from src.utils.logger.custom_logging import LoggerMixin
+from src.helpers.inference_executor_helper import InferenceBusyError, inference_executor
+from src.helpers.batch_scheduler_helper import get_batch_scheduler_stats
+from src.helpers.model_registry_helper import model_registry
+from src.helpers import inference_tasks_helper as inference_tasks
+from src.helpers.inference_backend_helper import (
+    KSERVE_MODELS, LocalInferenceBackend, numeric_tensor, pack_embeddings
+)
+
+logger = logging.getLogger(__name__)
+
+# Standalone inference server speaking the KServe v2 HTTP protocol, run with `python -m src.inference_server`.
+# It hosts the embedding and rerank models once for every API worker (INFERENCE_BACKEND=kserve) and
+# micro-batches the requests of all of them.
+
+EMBEDDING_KINDS = ('dense', 'sparse', 'late_interaction')
+
+
+class InferTensor(BaseModel):
+    name: str
+    shape: List[int]
+    datatype: str
+    data: List[Any]
+
+
+class InferRequest(BaseModel):
+    id: str | None = None
+    inputs: List[InferTensor]
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+
+
+class InferenceServer(LoggerMixin):
+    def __init__(self):
+        super().__init__()
+        # Embeddings are batched across requests too, unlike in the API process
+        self.backend = LocalInferenceBackend(batch_embeddings=True)
+        self.ready = False
+
+    @staticmethod
+    def _texts(request: InferRequest, name: str) -> List[str]:
+        for tensor in request.inputs:
+            if tensor.name == name:
+                if tensor.datatype != 'BYTES':
+                    raise HTTPException(status_code=400, detail=f"Input '{name}' must be a BYTES tensor")
+                return [str(item) for item in tensor.data]
+        raise HTTPException(status_code=400, detail=f"Missing input '{name}'")
+
+    @staticmethod
+    def _kind(request: InferRequest) -> str:
+        kind = request.parameters.get('kind', 'dense')
+        if kind not in EMBEDDING_KINDS:
+            raise HTTPException(status_code=400, detail=f"Unsupported embedding kind '{kind}', expected one of {EMBEDDING_KINDS}")
+        return kind
+
+    async def infer(self, model_name: str, request: InferRequest) -> List[Dict[str, Any]]:
+        """
+        Run one KServe v2 inference request.
+
+        Args:
+            model_name (str): One of KSERVE_MODELS
+            request (InferRequest): Inputs 'text' (embeddings, encode) or 'query' and 'passage' (rerank),
+                                    parameters 'kind' (embeddings) or 'model_key' (rerank, encode)
+
+        Returns:
+            List[Dict[str, Any]]: KServe v2 output tensors
+        """
+        if model_name == 'query_embed':
+            kind = self._kind(request)
+            return pack_embeddings(kind, await self.backend.query_embed(kind, self._texts(request, 'text')))
+
+        if model_name == 'passage_embed':
+            kind = self._kind(request)
+            return pack_embeddings(kind, await self.backend.passage_embed(kind, self._texts(request, 'text')))
+
+        if model_name == 'rerank':
+            queries, passages = self._texts(request, 'query'), self._texts(request, 'passage')
+            if len(queries) != len(passages):
+                raise HTTPException(status_code=400, detail="Inputs 'query' and 'passage' must have the same length")
+            scores = await self.backend.rerank(request.parameters.get('model_key'),
+                                               [[query, passage] for query, passage in zip(queries, passages)])
+            return [numeric_tensor('scores', np.asarray(scores, dtype=np.float32).reshape(-1), 'FP32')]
+
+        if model_name == 'encode':
+            embeddings = await self.backend.encode(request.parameters.get('model_key'), self._texts(request, 'text'))
+            return [numeric_tensor('embedding', np.asarray(embeddings, dtype=np.float32), 'FP32')]
+
+        raise HTTPException(status_code=404, detail=f"Unknown model '{model_name}', expected one of {KSERVE_MODELS}")
+
+
+inference_server = InferenceServer()
+
+
+@asynccontextmanager
+async def server_lifespan(app: FastAPI):
+    logger.info(f'event=inference-server-startup models={KSERVE_MODELS}')
+    if settings.MODEL_WARMUP:
+        model_stats = await inference_executor.warmup(inference_tasks.warmup_models)
+        logger.info(f'event=inference-server-model-warmup models={model_stats}')
+    inference_server.ready = True
+    yield
+    inference_executor.shutdown(wait=False)
+    logger.info('event=inference-server-shutdown')
+
+
+app = FastAPI(title='Inference server', lifespan=server_lifespan)
+
+
+@app.get('/v2/health/live')
+async def server_live():
+    return {'live': True}
+
+
+@app.get('/v2/health/ready')
+async def server_ready():
+    if not inference_server.ready:
+        return JSONResponse(status_code=503, content={'ready': False})
+    return {'ready': True}
+
+
+@app.get('/v2/models/{model_name}')
+async def model_metadata(model_name: str):
+    if model_name not in KSERVE_MODELS:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{model_name}'")
+    inputs = [{'name': 'query', 'datatype': 'BYTES', 'shape': [-1]}, {'name': 'passage', 'datatype': 'BYTES', 'shape': [-1]}] \
+        if model_name == 'rerank' else [{'name': 'text', 'datatype': 'BYTES', 'shape': [-1]}]
+    return {'name': model_name, 'platform': 'python', 'inputs': inputs}
+
+
+@app.get('/v2/models/{model_name}/ready')
+async def model_ready(model_name: str):
+    if model_name not in KSERVE_MODELS:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{model_name}'")
+    return {'name': model_name, 'ready': inference_server.ready}
+
+
+@app.post('/v2/models/{model_name}/infer')
+async def model_infer(model_name: str, request: InferRequest):
+    try:
+        outputs = await inference_server.infer(model_name, request)
+    except InferenceBusyError as e:
+        return JSONResponse(status_code=503, content={'error': str(e)})
+    except ValueError as e:
+        # e.g. a model key outside of the model config allowlist
+        return JSONResponse(status_code=400, content={'error': str(e)})
+    return {'model_name': model_name, 'id': request.id, 'outputs': outputs}
+
+
+@app.get('/metrics')
+async def server_metrics():
+    return {
+        'inference_executor': inference_executor.stats(),
+        'batch_schedulers': get_batch_scheduler_stats(),
+        'models': model_registry.stats(),
+    }
+
+
+if __name__ == '__main__':
+    # A single process: the models are loaded once and every API worker shares them through this server
+    uvicorn.run(app,
+                host=settings.INFERENCE_SERVER_HOST,
+                port=settings.INFERENCE_SERVER_PORT,
+                log_level=settings.LOG_LEVEL.lower())
@@ -14,6 +14,10 @@ from src.utils.config import settings
 from src.utils.constants import HONGTHAI_LLM
 from src.app import IncludeAPIRouter, logger_instance
 from src.utils.config_loader import ConfigReaderInstance
+from src.helpers.inference_executor_helper import inference_executor
+from src.helpers import inference_tasks_helper as inference_tasks
+from src.helpers.inference_backend_helper import inference_backend
+from src.helpers.qdrant_connection_helper import close_qdrant_clients
 
 
 logger = logger_instance.get_logger(__name__)
@@ -54,8 +58,15 @@ def get_application(lifespan: Any = None):
 async def app_lifespan(app: FastAPI):
     logger.info(HONGTHAI_LLM)
     logger.info(f'event=app-startup')
+    if settings.MODEL_WARMUP and settings.INFERENCE_BACKEND == 'local':
+        # Models are never loaded at import time, load them here so the first requests do not pay for it
+        model_stats = await inference_executor.warmup(inference_tasks.warmup_models)
+        logger.info(f'event=app-model-warmup models={model_stats}')
     yield
     # Code to execute when app is shutting down
+    await inference_backend.aclose()
+    await close_qdrant_clients()
+    inference_executor.shutdown(wait=False)
     logger.info(f'event=app-shutdown message="All connections are closed."')
 
 
@@ -79,10 +90,15 @@ if __name__ == '__main__':
     log_config['formatters']['access']['datefmt'] = logging_config.get('DATE_FORMATTER')
     log_config['formatters']['default']['datefmt'] = logging_config.get('DATE_FORMATTER')
     
-    uvicorn.run('src.main:app',
-                host=settings.HOST,
-                port=settings.PORT,
-                log_level=settings.LOG_LEVEL.lower(),
-                log_config=log_config,
-                workers=settings.UVICORN_WORKERS
-               )
+    if settings.SERVING_MODE == 'preload':
+        # Load the models once here and fork the workers, which share them copy-on-write
+        from src.helpers.preload_server_helper import PreloadServer
+        PreloadServer(app, log_config=log_config).run()
+    else:
+        uvicorn.run('src.main:app',
+                    host=settings.HOST,
+                    port=settings.PORT,
+                    log_level=settings.LOG_LEVEL.lower(),
+                    log_config=log_config,
+                    workers=settings.UVICORN_WORKERS
+                   )
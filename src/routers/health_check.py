@@ -1,3 +1,5 @@
+import os
+
 from fastapi import status
 from fastapi.routing import APIRouter
 from fastapi.responses import JSONResponse
@@ -5,6 +7,10 @@ from fastapi.responses import JSONResponse
 from src.app import logger_instance
 from src.utils.config import settings
 from src.utils.config_loader import ConfigReaderInstance
+from src.helpers.cache_helper import query_embedding_cache, rerank_score_cache
+from src.helpers.batch_scheduler_helper import get_batch_scheduler_stats
+from src.helpers.inference_executor_helper import inference_executor
+from src.helpers.model_registry_helper import model_registry, process_memory_mb
 
 
 router = APIRouter()
@@ -24,3 +30,17 @@ async def health_check() -> JSONResponse:
     logger.info('event=health-check-success message="Successful health check. "')
     content = {'REVISION': api_config.get('API_VERSION')}
     return JSONResponse(content=content, status_code=status.HTTP_200_OK)
+
+
+@router.get('/metrics', response_description='Runtime cache and batching metrics')
+async def metrics() -> JSONResponse:
+    content = {
+        'query_embedding_cache': query_embedding_cache.stats(),
+        'rerank_score_cache': rerank_score_cache.stats(),
+        'batch_schedulers': get_batch_scheduler_stats(),
+        'inference_executor': inference_executor.stats(),
+        'models': model_registry.stats(),
+        # In preload serving mode uss_mb is the memory this worker does not share with the master
+        'process': {'pid': os.getpid(), **process_memory_mb()},
+    }
+    return JSONResponse(content=content, status_code=status.HTTP_200_OK)
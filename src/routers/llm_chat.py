@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Response, Query, status, Depends
-from typing import Annotated
+import json
+from fastapi import APIRouter, Response, Query, status, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Annotated, Any, AsyncIterator, Dict
 
 from src.handlers.llm_chat_handler import ChatHandler, ChatMessageHistory
 from src.handlers.auth_handler import Authentication
+from src.schemas.base import RequestWebsocketBase
 from src.utils.config import settings
 
 # Initialize authentication handler
 auth = Authentication()
 router = APIRouter(dependencies=[Depends(auth.get_current_user)])
+# The OAuth2 bearer dependency does not apply to WebSocket connections, they pass the token as a query parameter
+ws_router = APIRouter()
+
+
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False, default=str)}\n\n"
 
 @router.post("/llm_chat", response_description="Chat with LLM system")
 async def chat_with_llm(
@@ -42,6 +53,68 @@ async def chat_with_llm(
         response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     return resp
 
+@router.post("/llm_chat/stream", response_description="Chat with LLM system, streamed as Server-Sent Events")
+async def chat_with_llm_stream(
+    session_id: Annotated[str, Query()],
+    question_input: Annotated[str, Query()],
+    model_name: Annotated[str, Query()] = 'llama3.1:8b-instruct-q4_K_M',
+    collection_name: Annotated[str, Query()] = settings.QDRANT_COLLECTION_NAME,
+):
+    """
+    Send a message to the LLM system and receive the answer as it is generated
+    
+    Args:
+        session_id: The ID of the chat session
+        question_input: The user's message
+        model_name: The LLM model to use (default: llama3.1:8b-instruct-q4_K_M)
+        collection_name: The vector store collection to query (default: from settings)
+        
+    Returns:
+        text/event-stream of `sources`, `token` (one per chunk) and `done` or `error` events
+    """
+    events = ChatHandler().stream_request_chat(
+        session_id=session_id,
+        question_input=question_input,
+        model_name=model_name,
+        collection_name=collection_name
+    )
+    # Disable proxy buffering so every token is flushed to the client immediately
+    return StreamingResponse(_sse_events(events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@ws_router.websocket("/llm_chat/ws")
+async def chat_with_llm_websocket(websocket: WebSocket, token: Annotated[str, Query()]):
+    """
+    Chat over a WebSocket: send one RequestWebsocketBase JSON message per question and receive
+    the same events as `/llm_chat/stream`, each as a JSON message {"event": ..., "data": ...}
+    
+    Args:
+        token: Bearer access token of the user
+    """
+    if auth.get_user_from_token(token) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    chat_handler = ChatHandler()
+    try:
+        while True:
+            try:
+                request = RequestWebsocketBase.model_validate(await websocket.receive_json())
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({'event': 'error', 'data': {'message': f"Invalid request: {str(e)}"}})
+                continue
+
+            async for event in chat_handler.stream_request_chat(
+                session_id=request.session_id,
+                question_input=request.question,
+                model_name=request.llm_model_name,
+                collection_name=request.collection_name or settings.QDRANT_COLLECTION_NAME
+            ):
+                await websocket.send_text(json.dumps(event, ensure_ascii=False, default=str))
+    except WebSocketDisconnect:
+        pass
+
 @router.post("/{user_id}/create_session", response_description="Create session")
 async def create_session(
     response: Response,
@@ -2,8 +2,10 @@ from fastapi import APIRouter, Response, Query, status, Depends, Body
 from typing import Annotated, List, Optional
 from pydantic import BaseModel, Field, validator
 import uuid
+from src.utils.config import settings
 from src.schemas.response import BasicResponse
 from src.handlers.rerank_handler import default_reranker
+from src.helpers.inference_executor_helper import InferenceBusyError
 
 router = APIRouter()
 
@@ -21,10 +23,20 @@ class Candidate(BaseModel):
 class RerankRequest(BaseModel):
     candidates: List[Candidate]
 
+class PointCandidate(BaseModel):
+    point_id: str
+    # Only used when the point id is unknown in the collection
+    content: Optional[str] = None
+
+class RerankPointsRequest(BaseModel):
+    collection_name: str = settings.QDRANT_COLLECTION_NAME
+    candidates: List[PointCandidate]
+
 @router.post("/rerank", response_description="Rerank")
 async def rerank_endpoint(response: Response,
                     query: Annotated[str, Query()] = None,
                     threshold: Annotated[float, Query()] = 0.3,
+                    top_k: Annotated[Optional[int], Query(ge=1)] = None,
                     request: RerankRequest = Body(include_in_schema=False), 
                     ):
     """
@@ -34,6 +46,7 @@ async def rerank_endpoint(response: Response,
     Args:
         query (str): Query string for reranking
         threshold (float): Score threshold for filtering results
+        top_k (Optional[int]): Maximum number of results to return
         request (RerankRequest): Request body with candidates
         
     Returns:
@@ -41,7 +54,7 @@ async def rerank_endpoint(response: Response,
     """
     candidates = request.candidates
     try:
-        result = default_reranker.process_candidates(candidates, query, threshold)
+        result = await default_reranker.process_candidates(candidates, query, threshold, top_k)
 
         result_response = BasicResponse(
             status="success",
@@ -49,6 +62,13 @@ async def rerank_endpoint(response: Response,
             data=result
         )
         response.status_code = status.HTTP_200_OK
+    except InferenceBusyError as e:
+        result_response = BasicResponse(
+            status="fail",
+            message=f"Reranking rejected, server is busy: {str(e)}",
+            data=request.candidates
+        )
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     except Exception as e:
         # Create a failure response in case of any issues
         result_response = BasicResponse(
@@ -60,6 +80,53 @@ async def rerank_endpoint(response: Response,
 
     return result_response
 
+@router.post("/rerank/points", response_description="Rerank Qdrant points")
+async def rerank_points_endpoint(response: Response,
+                    query: Annotated[str, Query()] = None,
+                    threshold: Annotated[float, Query()] = 0.3,
+                    top_k: Annotated[Optional[int], Query(ge=1)] = None,
+                    request: RerankPointsRequest = Body(include_in_schema=False),
+                    ):
+    """
+    Rerank candidates given by Qdrant point id, scoring the dense vectors already stored in the collection
+    instead of re-embedding their content.
+    
+    Args:
+        query (str): Query string for reranking
+        threshold (float): Score threshold for filtering results
+        top_k (Optional[int]): Maximum number of results to return
+        request (RerankPointsRequest): Request body with the collection name and point candidates
+        
+    Returns:
+        BasicResponse: Response with reranked results
+    """
+    try:
+        result = await default_reranker.process_point_candidates(request.candidates, query, threshold,
+                                                                 request.collection_name, top_k)
+
+        result_response = BasicResponse(
+            status="success",
+            message="Reranking is successful!",
+            data=result
+        )
+        response.status_code = status.HTTP_200_OK
+    except InferenceBusyError as e:
+        result_response = BasicResponse(
+            status="fail",
+            message=f"Reranking rejected, server is busy: {str(e)}",
+            data=request.candidates
+        )
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    except Exception as e:
+        result_response = BasicResponse(
+            status="fail",
+            message=f"Reranking failed: {str(e)}",
+            data=request.candidates
+        )
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    return result_response
+
 # from fastapi import APIRouter, Response, Query, status, Depends, Body
 # from typing import Annotated, List, Optional
 # from pydantic import BaseModel, Field, validator
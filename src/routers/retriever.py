@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Response, Query, status
-from typing import Annotated
+from fastapi import APIRouter, Response, Query, Body, status
+from typing import Annotated, List, Optional
+from pydantic import ValidationError
 from src.handlers.retrieval_handler import default_search_retrieval
 from src.utils.config import settings
+from src.utils.constants import SearchProfileName
 from src.schemas.response import BasicResponse
+from src.schemas.base import RequestBatchRetrieval
+from src.schemas.search import get_search_profile
 
 router = APIRouter()
 
@@ -10,7 +14,18 @@ router = APIRouter()
 async def retriever(response: Response,
                     query: Annotated[str, Query()],
                     top_k: Annotated[int, Query()] = 5,
-                    collection_name: Annotated[str, Query()] = settings.QDRANT_COLLECTION_NAME
+                    collection_name: Annotated[str, Query()] = settings.QDRANT_COLLECTION_NAME,
+                    search_profile: Annotated[str, Query(enum=SearchProfileName.list())] = SearchProfileName.Balanced.value,
+                    dense_limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+                    sparse_limit: Annotated[Optional[int], Query(ge=1, le=1000)] = None,
+                    limit: Annotated[Optional[int], Query(ge=1, le=500)] = None,
+                    hnsw_ef: Annotated[Optional[int], Query(ge=1, le=4096)] = None,
+                    exact: Annotated[Optional[bool], Query()] = None,
+                    quantization_rescore: Annotated[Optional[bool], Query()] = None,
+                    quantization_oversampling: Annotated[Optional[float], Query(ge=1.0, le=10.0)] = None,
+                    document_id: Annotated[Optional[List[str]], Query()] = None,
+                    document_name: Annotated[Optional[List[str]], Query()] = None,
+                    extension: Annotated[Optional[List[str]], Query()] = None,
                 ):
     """
     Retrieve and rerank documents from the vector database.
@@ -20,12 +35,34 @@ async def retriever(response: Response,
         query (str): Query string for retrieval
         top_k (int): Number of top results to return
         collection_name (str): Name of the collection to search
+        search_profile (str): Search preset trading recall for latency (fast, balanced, accurate)
+        dense_limit, sparse_limit, limit, hnsw_ef, exact, quantization_rescore, quantization_oversampling:
+            Optional overrides of the preset values
+        document_id, document_name, extension: Optional (repeatable) filters pushed down into the search
         
     Returns:
         BasicResponse: Response with retrieved documents
     """
+    try:
+        profile = get_search_profile(search_profile,
+                                     dense_limit=dense_limit,
+                                     sparse_limit=sparse_limit,
+                                     limit=limit,
+                                     hnsw_ef=hnsw_ef,
+                                     exact=exact,
+                                     quantization_rescore=quantization_rescore,
+                                     quantization_oversampling=quantization_oversampling)
+    except (ValueError, ValidationError) as e:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+        return BasicResponse(status="Failed",
+                         message=f"Invalid search profile: {str(e)}",
+                         data=None)
+
     # Use the singleton instance instead of creating a new one
-    resp = await default_search_retrieval.qdrant_retrieval(query, top_k, collection_name)
+    resp = await default_search_retrieval.qdrant_retrieval(query, top_k, collection_name, search_profile=profile,
+                                                           document_ids=document_id,
+                                                           document_names=document_name,
+                                                           extensions=extension)
     
     if resp:
         response.status_code = status.HTTP_200_OK
@@ -38,6 +75,44 @@ async def retriever(response: Response,
                          message="Failed retriever data from qdrant",
                          data=resp)
 
+@router.post("/retriever/batch", response_description="Batch retriever")
+async def batch_retriever(response: Response,
+                          request: RequestBatchRetrieval = Body(...)):
+    """
+    Retrieve and rerank documents for many queries against one collection.
+    Queries are embedded, searched (query_batch_points) and reranked in batched calls.
+    
+    Args:
+        request (RequestBatchRetrieval): Collection name, queries, top_k and search profile
+        
+    Returns:
+        BasicResponse: Response with one list of retrieved documents per query
+    """
+    try:
+        profile = get_search_profile(request.search_profile)
+    except ValueError as e:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+        return BasicResponse(status="Failed",
+                         message=f"Invalid search profile: {str(e)}",
+                         data=None)
+
+    resp = await default_search_retrieval.qdrant_batch_retrieval(request.queries, request.top_k,
+                                                                 request.collection_name, search_profile=profile,
+                                                                 document_ids=request.document_ids,
+                                                                 document_names=request.document_names,
+                                                                 extensions=request.extensions)
+
+    if resp:
+        response.status_code = status.HTTP_200_OK
+        data = [[docs.json() for docs in query_docs] for query_docs in resp]
+        return BasicResponse(status="Success",
+                         message="Success batch retriever data from qdrant",
+                         data=data)
+    else:
+        return BasicResponse(status="Failed",
+                         message="Failed batch retriever data from qdrant",
+                         data=resp)
+
 # from fastapi import APIRouter, Response, Query, status, Depends
 # from typing import Annotated
 # from src.handlers.retrieval_handler import SearchRetrieval
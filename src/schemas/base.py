@@ -1,7 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing_extensions import Literal
 
-from src.utils.constants import TypeDatabase, TypeSearch
+from src.utils.constants import TypeDatabase, TypeSearch, SearchProfileName
 
 
 class RequestUserBase(BaseModel):
@@ -16,6 +16,7 @@ class RequestWebsocketBase(BaseModel):
     created_by: str = ''
     llm_model_name: str
     type_db: str = TypeDatabase.Qdrant.value
+    collection_name: str | None = None
 
 
 class RequestRetrievalBase(BaseModel):
@@ -26,6 +27,15 @@ class RequestRetrievalBase(BaseModel):
     top_k: int = 3
     is_rerank: bool = True
 
+class RequestBatchRetrieval(BaseModel):
+    collection_name: str
+    queries: list[str] = Field(min_length=1, max_length=512)
+    top_k: int = Field(5, ge=1, le=500)
+    search_profile: str = SearchProfileName.Balanced.value
+    document_ids: list[str] | None = None
+    document_names: list[str] | None = None
+    extensions: list[str] | None = None
+
 class RequestRetrievalDocument(BaseModel):
     collection_name: str
     document_id: str
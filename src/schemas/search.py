@@ -0,0 +1,55 @@
+from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+
+from src.utils.constants import SearchProfileName
+
+
+class SearchProfile(BaseModel):
+    dense_limit: int = Field(40, ge=1, le=1000, description='Number of candidates prefetched by the dense vector')
+    sparse_limit: int = Field(40, ge=1, le=1000, description='Number of candidates prefetched by BM25')
+    limit: int = Field(20, ge=1, le=500, description='Number of points returned by the ColBERT rescoring stage')
+    hnsw_ef: Optional[int] = Field(None, ge=1, le=4096, description='Size of the HNSW beam, Qdrant default when None')
+    exact: bool = Field(False, description='Bypass HNSW and run an exact (full scan) dense search')
+    quantization_rescore: Optional[bool] = Field(None, description='Rescore quantized candidates with the original vectors')
+    quantization_oversampling: Optional[float] = Field(None, ge=1.0, le=10.0,
+                                                       description='Fetch oversampling * limit quantized candidates before rescoring')
+
+    @model_validator(mode='after')
+    def check_limits(self) -> 'SearchProfile':
+        if self.limit > self.dense_limit + self.sparse_limit:
+            raise ValueError('limit can not be greater than dense_limit + sparse_limit')
+        return self
+
+
+SEARCH_PROFILES = {
+    SearchProfileName.Fast.value: SearchProfile(dense_limit=20, sparse_limit=20, limit=10,
+                                                hnsw_ef=32, quantization_rescore=False),
+    # Same values hybrid_search has always used
+    SearchProfileName.Balanced.value: SearchProfile(),
+    SearchProfileName.Accurate.value: SearchProfile(dense_limit=100, sparse_limit=100, limit=40,
+                                                    hnsw_ef=256, quantization_rescore=True, quantization_oversampling=2.0),
+}
+
+
+def get_search_profile(profile: str | SearchProfile | None = None, **overrides) -> SearchProfile:
+    """
+    Resolve a preset name or profile into a validated SearchProfile.
+
+    Args:
+        profile (str | SearchProfile | None): Preset name, explicit profile or None for the balanced preset
+        **overrides: Profile fields overriding the preset, None values are ignored
+
+    Returns:
+        SearchProfile: The validated profile
+    """
+    if profile is None:
+        profile = SearchProfileName.Balanced.value
+    if isinstance(profile, str):
+        if profile not in SEARCH_PROFILES:
+            raise ValueError(f"Unknown search profile {profile}, expected one of {SearchProfileName.list()}")
+        profile = SEARCH_PROFILES[profile]
+
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    if not overrides:
+        return profile
+    return SearchProfile(**{**profile.model_dump(), **overrides})
@@ -36,6 +36,11 @@ class Settings(BaseSettings):
     
     # Number of workers when running Uvicorn.
     UVICORN_WORKERS: int = Field(1, env='UVICORN_WORKERS')
+    # 'uvicorn': every worker loads its own models. 'preload': models are loaded once in a master process
+    # which then forks the workers, so the weights are shared copy-on-write (POSIX only, thread inference mode)
+    SERVING_MODE: str = Field('uvicorn', env='SERVING_MODE')
+    # Seconds between per-worker memory reports of the preload master, 0 reports only once at startup
+    PRELOAD_MEMORY_REPORT_INTERVAL: float = Field(0, env='PRELOAD_MEMORY_REPORT_INTERVAL')
 
     API_CONFIG_FILENAME: str = Field('api_config.yaml', env='API_CONFIG_FILENAME')
     LOG_CONFIG_FILENAME: str = Field('logging_config.yaml', env='LOG_CONFIG_FILENAME')
@@ -55,6 +60,78 @@ class Settings(BaseSettings):
     # Define config for Qdrant
     QDRANT_ENDPOINT: str | None = Field(..., env='QDRANT_ENDPOINT') 
     QDRANT_COLLECTION_NAME: str = Field(..., env='QDRANT_COLLECTION_NAME')
+    # Use gRPC (binary protobuf vectors) instead of REST/JSON for the Qdrant calls that support it
+    QDRANT_PREFER_GRPC: bool = Field(False, env='QDRANT_PREFER_GRPC')
+    QDRANT_GRPC_PORT: int = Field(6334, env='QDRANT_GRPC_PORT')
+    QDRANT_TIMEOUT: int = Field(600, env='QDRANT_TIMEOUT')
+    # Size of the REST keep-alive connection pool of each Qdrant client
+    QDRANT_POOL_SIZE: int = Field(20, env='QDRANT_POOL_SIZE')
+    # Largest gRPC message in MB, large ColBERT multivector batches exceed the 4MB gRPC default
+    QDRANT_GRPC_MAX_MESSAGE_MB: int = Field(64, env='QDRANT_GRPC_MAX_MESSAGE_MB')
+
+    # Seconds a cached collection fact (existence, config, point count, owner) stays valid
+    COLLECTION_REGISTRY_TTL: float = Field(60, env='COLLECTION_REGISTRY_TTL')
+
+    # Define how retrieved chunks are expanded before being sent to the LLM
+    # 'section' joins every chunk under the same headers, 'window' only joins +/- QDRANT_EXPANSION_WINDOW chunks around each hit,
+    # 'parent' looks up the section record precomputed at ingestion time
+    QDRANT_EXPANSION_MODE: str = Field('section', env='QDRANT_EXPANSION_MODE')
+    QDRANT_EXPANSION_WINDOW: int = Field(2, env='QDRANT_EXPANSION_WINDOW')
+    # Hard cap (characters) on the page_content of one expanded document
+    QDRANT_EXPANSION_MAX_CHARS: int = Field(8000, env='QDRANT_EXPANSION_MAX_CHARS')
+    # Chunks fetched per section and round trip by the 'section' expansion, larger sections take more pages
+    QDRANT_EXPANSION_PAGE_SIZE: int = Field(256, env='QDRANT_EXPANSION_PAGE_SIZE')
+
+    # Define config for the query embedding cache (dense, BM25 and ColBERT query vectors)
+    QUERY_EMBEDDING_CACHE_SIZE: int = Field(2048, env='QUERY_EMBEDDING_CACHE_SIZE')
+    # Directory of the on-disk tier, disabled when not set
+    QUERY_EMBEDDING_CACHE_DIR: str | None = Field(None, env='QUERY_EMBEDDING_CACHE_DIR')
+
+    # Pool running model inference off the event loop: 'thread' shares the models of the API process,
+    # 'process' loads the models once in each worker process
+    INFERENCE_EXECUTOR_MODE: str = Field('thread', env='INFERENCE_EXECUTOR_MODE')
+    INFERENCE_EXECUTOR_WORKERS: int = Field(4, env='INFERENCE_EXECUTOR_WORKERS')
+    # torch intra-op threads (per process), 0 keeps the torch default
+    INFERENCE_INTRA_OP_THREADS: int = Field(2, env='INFERENCE_INTRA_OP_THREADS')
+    # Backpressure: calls admitted at once, and seconds a caller waits for a slot before being rejected
+    INFERENCE_MAX_PENDING: int = Field(64, env='INFERENCE_MAX_PENDING')
+    INFERENCE_QUEUE_TIMEOUT: float = Field(30, env='INFERENCE_QUEUE_TIMEOUT')
+    # Load the default models during app startup instead of on the first request
+    MODEL_WARMUP: bool = Field(True, env='MODEL_WARMUP')
+    # RAM budget of the loaded models per process, least recently used models are evicted beyond it, 0 disables eviction
+    MODEL_CACHE_BUDGET_MB: float = Field(8192, env='MODEL_CACHE_BUDGET_MB')
+
+    # Where the embedding and rerank models run: 'local' in the API process, 'kserve' in the inference
+    # server (python -m src.inference_server) called over the KServe v2 HTTP protocol
+    INFERENCE_BACKEND: str = Field('local', env='INFERENCE_BACKEND')
+    INFERENCE_SERVER_URL: str = Field('http://localhost:8080', env='INFERENCE_SERVER_URL')
+    # Size of the keep-alive connection pool of each API worker to the inference server
+    INFERENCE_SERVER_POOL_SIZE: int = Field(32, env='INFERENCE_SERVER_POOL_SIZE')
+    INFERENCE_SERVER_TIMEOUT: float = Field(60, env='INFERENCE_SERVER_TIMEOUT')
+    # Address the inference server listens on
+    INFERENCE_SERVER_HOST: str = Field('0.0.0.0', env='INFERENCE_SERVER_HOST')
+    INFERENCE_SERVER_PORT: int = Field(8080, env='INFERENCE_SERVER_PORT')
+
+    # Cross-request micro-batching of reranker inputs: flush at this many items or after this many milliseconds
+    RERANK_MAX_BATCH_SIZE: int = Field(64, env='RERANK_MAX_BATCH_SIZE')
+    RERANK_MAX_WAIT_MS: float = Field(5, env='RERANK_MAX_WAIT_MS')
+
+    # Cross-encoder pairs are truncated to RERANK_MAX_LENGTH tokens, sorted by length and run in buckets
+    # of at most RERANK_BUCKET_MAX_SIZE pairs and RERANK_BUCKET_MAX_TOKENS padded tokens
+    RERANK_MAX_LENGTH: int = Field(512, env='RERANK_MAX_LENGTH')
+    RERANK_BUCKET_MAX_SIZE: int = Field(32, env='RERANK_BUCKET_MAX_SIZE')
+    RERANK_BUCKET_MAX_TOKENS: int = Field(8192, env='RERANK_BUCKET_MAX_TOKENS')
+
+    # Minimum reranker score of a retrieved chunk
+    RERANK_SCORE_THRESHOLD: float = Field(0.3, env='RERANK_SCORE_THRESHOLD')
+    # Cached cross-encoder scores, keyed on (model, collection, query, passage hash), 0 disables the cache
+    RERANK_SCORE_CACHE_SIZE: int = Field(20000, env='RERANK_SCORE_CACHE_SIZE')
+    # Two-stage cascade: score every hit with a small cross-encoder (RERANKING_MODEL key), keep the best
+    # RERANK_CASCADE_TOP_N above RERANK_CASCADE_THRESHOLD, and run the main reranker on those only
+    RERANK_CASCADE_ENABLED: bool = Field(False, env='RERANK_CASCADE_ENABLED')
+    RERANK_CASCADE_MODEL: str = Field('CROSS_ENCODER_MS_MARCO_RERANK', env='RERANK_CASCADE_MODEL')
+    RERANK_CASCADE_TOP_N: int = Field(5, env='RERANK_CASCADE_TOP_N')
+    RERANK_CASCADE_THRESHOLD: float = Field(0.0, env='RERANK_CASCADE_THRESHOLD')
 
 # Avoid having to re-read the .env file and create the Settings object every time you access it
 @lru_cache()
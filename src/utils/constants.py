@@ -44,6 +44,16 @@ class TypeSearch(ExtendedEnum):
     MMR = "mmr"
     SimilarityWithScore = 'similarity_score_threshold'
 
+class SearchProfileName(ExtendedEnum):
+    Fast = 'fast'
+    Balanced = 'balanced'
+    Accurate = 'accurate'
+
+class ExpansionMode(ExtendedEnum):
+    Section = 'section'
+    Window = 'window'
+    Parent = 'parent'
+
 SCHEMA_DB = [
     
     {"name": "document_name", "type": "text_general", "indexed": "true", "stored": "true", "multiValued": "false"},